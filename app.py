@@ -1,37 +1,72 @@
-import streamlit as st
-from tigers import tigers_page
-from leopard import leopard_page
-from elephants import elephants_page  # Ensure this function exists in elephants.py
-
-# Set up the page configuration
-st.set_page_config(page_title="Animal Monitoring System", layout="wide")
-
-# Create a main menu with a selection box
-st.sidebar.title("Forest and Wildlife Framework")
-
-# Main selection box for system type
-main_selection = st.sidebar.selectbox(
-    "Select System",
-    ["Animal Monitoring System"]
-)
-
-# Conditional display based on the main selection
-if main_selection == "Animal Monitoring System":
-    # Show the sidebar for animal monitoring options
-    st.sidebar.title("Animal Monitoring System")
-
-    # Sidebar menu for animal types
-    animal_selection = st.sidebar.selectbox(
-        "Go to",
-        ["Tigers", "Leopards", "Elephants"]
-    )
-
-    # Display the selected animal monitoring page
-    if animal_selection == "Tigers":
-        tigers_page()
-    elif animal_selection == "Leopards":
-        leopard_page()
-    elif animal_selection == "Elephants":
-        elephants_page()  # Ensure you have elephants_page function in elephants.py
-
-
+import importlib
+
+import streamlit as st
+
+import instrumentation
+import warmup
+from species import SPECIES, load_page
+
+# Set to False on small deployments to fit forecast models on demand only
+PREWARM_FORECASTS = True
+
+
+def main():
+    # Set up the page configuration
+    st.set_page_config(page_title="Animal Monitoring System", layout="wide")
+
+    # Fit every species' forecast models in the background once per server process, and again
+    # whenever a census file changes
+    if PREWARM_FORECASTS:
+        warmup.start()
+
+    # Create a main menu with a selection box
+    st.sidebar.title("Forest and Wildlife Framework")
+
+    # Time every stage of this rerun when the timing panel is switched on
+    show_timings = st.sidebar.toggle("Show timing breakdown")
+    instrumentation.start_rerun(collect=show_timings)
+
+    # Main selection box for system type
+    main_selection = st.sidebar.selectbox(
+        "Select System",
+        ["Animal Monitoring System", "Forecast Trajectories"]
+    )
+
+    # Conditional display based on the main selection
+    if main_selection == "Animal Monitoring System":
+        # Show the sidebar for animal monitoring options
+        st.sidebar.title("Animal Monitoring System")
+
+        # Sidebar menu for animal types
+        animal_selection = st.sidebar.selectbox(
+            "Go to",
+            list(SPECIES)
+        )
+
+        # Import and display only the selected animal monitoring page
+        load_page(animal_selection)()
+
+    elif main_selection == "Forecast Trajectories":
+        # Multi-species, multi-year forecasts; imported on demand like the species pages
+        importlib.import_module("trajectories").trajectories_page()
+
+    # Per-rerun timing breakdown, plus the process-wide totals in Prometheus text format
+    if show_timings:
+        spans = instrumentation.rerun_spans()
+        st.sidebar.subheader("Timing breakdown")
+        st.sidebar.dataframe(
+            [{"Stage": name, "Detail": ", ".join(str(value) for value in labels.values()),
+              "ms": round(seconds * 1000, 1)}
+             for name, labels, seconds in spans],
+            hide_index=True)
+        # Process-wide counters such as the forecast single-flight hits, joins and misses
+        for name, stats in instrumentation.current_stats().items():
+            st.sidebar.caption(f"{name}: " + ", ".join(f"{stat} {round(value, 2)}" for stat, value in stats.items()))
+        st.sidebar.download_button("Download metrics", instrumentation.prometheus_text(),
+                                   file_name="metrics.prom", mime="text/plain")
+
+
+# Streamlit runs this script as __main__. Spawned forecast pool workers re-import it as
+# __mp_main__ and must not render a page or start another warm-up.
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Benchmarks for the animal monitoring app, runnable without the Streamlit UI.
+
+    python benchmark.py startup [--repeat N]
+    python benchmark.py pipeline [--repeat N] [--prophet-states N] [--scale-states N --scale-years N]
+                                 [--output run.json] [--baseline previous.json --threshold 1.25]
+
+The pipeline benchmark times each stage of a page render separately for every species: dataset
+parse, memory-mapped count store read, melt/reshape, Folium map build, _repr_html_ serialization,
+per-state Prophet fit and predict, the fast trend backend and Plotly figure construction. The scale-up options add a
+synthetic dataset with that many regions and census years. Results are printed as JSON; with
+--baseline, stages slower than threshold x the baseline are reported and the exit code is 1.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Each scenario runs in a fresh interpreter so nothing is already imported
+STARTUP_SCENARIOS = {
+    # What app.py used to import before any page rendered: every species module plus Prophet
+    'eager': 'import streamlit, tigers, leopard, elephants, prophet',
+    # The app shell with the lazy page registry, before a page is selected
+    'lazy_shell': 'import streamlit, species',
+    # The app shell plus the first selected page
+    'lazy_first_page': "import streamlit, species; species.load_page('Tigers')",
+}
+
+_STARTUP_PROBE = '''
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(elapsed, 'prophet' in sys.modules, 'folium' in sys.modules)
+'''
+
+
+def bench_startup(repeat):
+    results = {}
+    for name, code in STARTUP_SCENARIOS.items():
+        timings = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-c', _STARTUP_PROBE.format(code=code)],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            timings.append(float(output[0]))
+        results[name] = {
+            'median_seconds': statistics.median(timings),
+            'min_seconds': min(timings),
+            'prophet_loaded': output[1] == 'True',
+            'folium_loaded': output[2] == 'True',
+        }
+    results['speedup'] = results['eager']['median_seconds'] / results['lazy_first_page']['median_seconds']
+    return results
+
+
+def _timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        timings.append(time.perf_counter() - start)
+    return value, {'median_seconds': statistics.median(timings), 'min_seconds': min(timings), 'repeat': repeat}
+
+
+def synthetic_source(path, regions, census_years, seed=0):
+    # Write a wide census CSV with the given number of regions and census years
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    years = np.arange(2024 - 2 * (census_years - 1), 2025, 2)
+    base = rng.uniform(5, 2000, size=(regions, 1))
+    growth = rng.normal(0.01, 0.03, size=(regions, 1))
+    counts = rng.poisson(base * (1 + growth) ** (years - years[0]))
+    wide = pd.DataFrame(counts, columns=[f'Synthetic in {year}' for year in years])
+    wide.insert(0, 'State', [f'Region {i}' for i in range(regions)])
+    wide.to_csv(path, index=False)
+
+
+def bench_dataset(name, source, repeat, prophet_states, scatter=False):
+    # Time every stage of one species page against the given source file
+    import numpy as np
+    import pandas as pd
+
+    import count_store
+    import data
+    import trend
+    from forecasting import fits_prophet, new_model, predict_model, state_histories
+    from monitoring import build_count_map, build_state_figure, state_series
+    from species import SpeciesConfig
+
+    config = SpeciesConfig(key=name, name=name.title(), plural=name.title(), source=source,
+                           title_color='black', palette=('green', 'yellow', 'red'))
+    stages = {}
+
+    wide, stages['parse'] = _timed(lambda: data._read_source(source), repeat)
+    if data._parquet_enabled():
+        columnar = os.path.join(data.CACHE_DIR, f'{name}-columnar.parquet')
+        wide.to_parquet(columnar, index=False)
+        _, stages['columnar_read'] = _timed(lambda: pd.read_parquet(columnar), repeat)
+    store_dir = os.path.join(data.CACHE_DIR, f'{name}-store')
+    count_store.build_store({name: (source, 'benchmark', wide)}, store_dir)
+    _, stages['store_read'] = _timed(lambda: count_store.species_wide(name, 'benchmark', store_dir), repeat)
+    # Includes the dtype coercion, long table and coordinate join on top of the (cached) parse
+    dataset, stages['build_dataset'] = _timed(lambda: data._build_dataset(name, source, 'benchmark'), repeat)
+
+    def melt():
+        long = wide.melt(id_vars=['State'], var_name='Year', value_name='Count')
+        long['Year'] = long['Year'].str.extract(r'(\d{4})').astype(int)
+        return long
+    _, stages['melt_reshape'] = _timed(melt, repeat)
+
+    located = dataset.located
+    if scatter:
+        # Synthetic regions are not in the gazetteer; spread them over India instead
+        rng = np.random.default_rng(0)
+        located = located.assign(Latitude=rng.uniform(8, 34, len(located)),
+                                 Longitude=rng.uniform(68, 97, len(located)))
+    latest = dataset.year_columns[-1]
+    count_map, stages['map_build'] = _timed(
+        lambda: build_count_map(config, located, latest, 'benchmark', 10, 40), repeat)
+    html, stages['map_serialize'] = _timed(count_map._repr_html_, repeat)
+    stages['map_serialize']['html_bytes'] = len(html)
+
+    state = dataset.wide['State'].iloc[0]
+    years, counts = state_series(dataset)[state]
+    fig, stages['plotly_figures'] = _timed(lambda: build_state_figure(config, state, years, counts), repeat)
+    stages['plotly_figures']['json_bytes'] = len(fig.to_json())
+
+    future_years = list(range(2023, 2101))
+    _, stages['fast_forecast'] = _timed(lambda: trend.forecast_matrix(dataset.wide, future_years), repeat)
+
+    if prophet_states:
+        histories = [history for history in state_histories(dataset.wide).values()
+                     if fits_prophet(history)][:prophet_states]
+        dates = pd.to_datetime([f'{year}-12-31' for year in future_years])
+        models, stages['prophet_fit'] = _timed(lambda: [new_model().fit(history) for history in histories], 1)
+        _, stages['prophet_predict'] = _timed(
+            lambda: [predict_model(model, history, dates) for model, history in zip(models, histories)], 1)
+        for stage in ('prophet_fit', 'prophet_predict'):
+            stages[stage]['states'] = len(histories)
+            stages[stage]['per_state_seconds'] = stages[stage]['median_seconds'] / len(histories)
+
+    return {
+        'dataset': name,
+        'regions': len(dataset.wide),
+        'census_years': len(dataset.years),
+        'stages': stages,
+    }
+
+
+def bench_pipeline(repeat, prophet_states, scale_states, scale_years):
+    import data
+
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the benchmark's columnar copies out of the app's data cache
+        data.CACHE_DIR = tmp
+        results = [bench_dataset(species, source, repeat, prophet_states)
+                   for species, source in data.SOURCES.items()]
+
+        if scale_states or scale_years:
+            source = os.path.join(tmp, 'synthetic_historic_data.csv')
+            synthetic_source(source, scale_states or 30, scale_years or 6)
+            results.append(bench_dataset('synthetic', source, repeat, min(prophet_states, 5), scatter=True))
+
+    return {'datasets': results}
+
+
+def _metadata():
+    import pandas as pd
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+    }
+
+
+def compare_to_baseline(results, baseline, threshold):
+    # Stages whose median time grew by more than threshold x the baseline run
+    previous = {(entry['dataset'], stage): timing['median_seconds']
+                for entry in baseline['datasets'] for stage, timing in entry['stages'].items()}
+    regressions = []
+    for entry in results['datasets']:
+        for stage, timing in entry['stages'].items():
+            before = previous.get((entry['dataset'], stage))
+            if before and timing['median_seconds'] > before * threshold:
+                regressions.append({'dataset': entry['dataset'], 'stage': stage, 'baseline_seconds': before,
+                                    'seconds': timing['median_seconds'],
+                                    'ratio': timing['median_seconds'] / before})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    startup = subparsers.add_parser('startup', help='cold import time of the app shell, eager vs lazy')
+    startup.add_argument('--repeat', type=int, default=5)
+
+    pipeline = subparsers.add_parser('pipeline', help='per-stage timings of the load -> map -> forecast pipeline')
+    pipeline.add_argument('--repeat', type=int, default=5)
+    pipeline.add_argument('--prophet-states', type=int, default=3,
+                          help='states per dataset to fit with Prophet (0 skips Prophet)')
+    pipeline.add_argument('--scale-states', type=int, default=0, help='regions in the synthetic dataset')
+    pipeline.add_argument('--scale-years', type=int, default=0, help='census years in the synthetic dataset')
+    pipeline.add_argument('--output', help='also write the JSON results to this file')
+    pipeline.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    pipeline.add_argument('--threshold', type=float, default=1.25,
+                          help='slowdown ratio against the baseline reported as a regression')
+
+    args = parser.parse_args()
+    status = 0
+    if args.command == 'startup':
+        results = bench_startup(args.repeat)
+    else:
+        results = dict(_metadata(), **bench_pipeline(args.repeat, args.prophet_states,
+                                                     args.scale_states, args.scale_years))
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as f:
+                results['regressions'] = compare_to_baseline(results, json.load(f), args.threshold)
+            status = 1 if results['regressions'] else 0
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    print(json.dumps(results, indent=2))
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
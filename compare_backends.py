@@ -0,0 +1,95 @@
+"""Accuracy comparison of the fast trend backend against Prophet on the shipped datasets.
+
+Each state's latest census is held out, both backends are fitted on the earlier censuses,
+and their predictions for the held-out year are scored against the actual counts.
+
+    python compare_backends.py
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+import trend
+from data import SOURCES, load_dataset
+from forecasting import MAX_HORIZON_YEAR, fits_prophet, flat_table, new_model, predict_model, state_histories
+
+
+def _prophet_holdout(train, holdout_year):
+    # Fitted the way the app fits its models, with logistic growth between the state's bounds
+    predictions = []
+    for state, history in state_histories(train).items():
+        if not fits_prophet(history):
+            predictions.append(flat_table(history, [holdout_year])['yhat'].iloc[0])
+            continue
+        model = new_model().fit(history)
+        # Year-end dates, as the app's forecast tables use
+        forecast = predict_model(model, history, pd.to_datetime([f'{holdout_year}-12-31']))
+        predictions.append(forecast['yhat'].iloc[0])
+    return np.array(predictions)
+
+
+def _scores(actual, predicted):
+    errors = np.abs(predicted - actual)
+    nonzero = actual > 0
+    return {
+        'mae': float(errors.mean()),
+        'rmse': float(np.sqrt((errors ** 2).mean())),
+        'median_ape': float(np.median(errors[nonzero] / actual[nonzero])) if nonzero.any() else None,
+        'negative_predictions': int((predicted < 0).sum()),
+    }
+
+
+def compare(species, df):
+    # Hold out the latest census column and score both backends against it
+    holdout_column = df.columns[-1]
+    holdout_year = int(holdout_column.split()[-1])
+    train = df.drop(columns=holdout_column)
+    actual = df[holdout_column].to_numpy(dtype=float)
+
+    start = time.perf_counter()
+    prophet_pred = _prophet_holdout(train, holdout_year)
+    prophet_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # Same horizon as the app, so the linear/logistic choice matches the served forecasts
+    fast_pred, _, _ = trend.forecast_matrix(train, [holdout_year], horizon=(holdout_year, MAX_HORIZON_YEAR))
+    fast_pred = fast_pred[:, 0]
+    fast_seconds = time.perf_counter() - start
+
+    return {
+        'species': species,
+        'states': len(df),
+        'holdout_year': holdout_year,
+        'prophet': dict(_scores(actual, prophet_pred), seconds=prophet_seconds),
+        'fast': dict(_scores(actual, fast_pred), seconds=fast_seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    results = [compare(species, load_dataset(species).wide) for species in SOURCES]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        print(f"{result['species']} ({result['states']} states, holdout {result['holdout_year']})")
+        for backend in ('prophet', 'fast'):
+            scores = result[backend]
+            median_ape = 'n/a' if scores['median_ape'] is None else f"{scores['median_ape']:.1%}"
+            print(f"  {backend:<8} MAE {scores['mae']:9.1f}  RMSE {scores['rmse']:9.1f}  "
+                  f"median APE {median_ape:>7}  negative {scores['negative_predictions']:2d}  "
+                  f"{scores['seconds']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Convert the historic census files into the shared memory-mapped count store.
+
+    python -m count_store [--dir count_store]
+
+Writes every species in data.SOURCES into one set of .npy arrays (int16 state codes, int16
+years, int32 counts, int8 cell status) plus a manifest. Every session and server process maps the arrays
+read-only, so the pages skip parsing the CSV/xlsx sources. Run it again after editing a
+source; a species whose source changed since the last refresh is read from the file instead.
+"""
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Directory holding the manifest and the versioned .npy arrays
+STORE_DIR = os.environ.get('COUNT_STORE_DIR', 'count_store')
+
+MANIFEST_NAME = 'manifest.json'
+ARRAYS = ('states', 'years', 'counts', 'status')
+
+# Bumped when the array layout changes; stores written in another format are ignored
+FORMAT = 2
+
+# Status of every cell, since int32 counts cannot hold NaN. Counts are only meaningful for
+# VALID cells; negative counts are stored as they are, so ingest validation reports them.
+VALID = 0
+MISSING = 1
+NOT_A_NUMBER = 2
+
+# Stands in for the original text of NOT_A_NUMBER cells in species_wide
+NOT_A_NUMBER_TEXT = 'not a number'
+
+_opened = None
+_lock = threading.Lock()
+
+
+def _open(store_dir):
+    # (manifest, name -> read-only memmap), reopened only when the manifest is replaced
+    global _opened
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    try:
+        stat = os.stat(manifest_path)
+    except OSError:
+        return None
+    stamp = (os.path.abspath(store_dir), stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        if _opened is None or _opened[0] != stamp:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('format') != FORMAT:
+                return None
+            arrays = {name: np.load(os.path.join(store_dir, f'{name}-{manifest["version"]}.npy'), mmap_mode='r')
+                      for name in ARRAYS}
+            _opened = (stamp, manifest, arrays)
+        return _opened[1], _opened[2]
+
+
+def species_counts(species, fingerprint, store_dir=STORE_DIR):
+    # (state names, year columns, years, counts, status) for species, or None when the store is
+    # missing or was built from another version of the source. counts and status are read-only
+    # (states x years) views of the mapped files; nothing is copied.
+    opened = _open(store_dir)
+    if opened is None:
+        return None
+    manifest, arrays = opened
+    entry = manifest['species'].get(species)
+    if entry is None or entry['fingerprint'] != fingerprint:
+        return None
+
+    start, stop = entry['start'], entry['stop']
+    shape = (stop - start) // len(entry['years']), len(entry['years'])
+    state_codes = arrays['states'][start:stop:shape[1]]
+    states = [manifest['states'][code] for code in state_codes.tolist()]
+    return (states, entry['year_columns'], entry['years'], arrays['counts'][start:stop].reshape(shape),
+            arrays['status'][start:stop].reshape(shape))
+
+
+def species_wide(species, fingerprint, store_dir=STORE_DIR):
+    # The species' wide State/year-column table rebuilt from the store, or None (see species_counts)
+    import pandas as pd
+
+    stored = species_counts(species, fingerprint, store_dir)
+    if stored is None:
+        return None
+    # Missing cells come back as NaN and non-numeric ones as text, so clean_wide reports them
+    # the same way as when the source file is parsed
+    states, year_columns, _, counts, status = stored
+    values = np.where(status == VALID, counts, np.nan)
+    if (status == NOT_A_NUMBER).any():
+        values = np.where(status == NOT_A_NUMBER, NOT_A_NUMBER_TEXT, values.astype(object))
+    wide = pd.DataFrame(values, columns=year_columns)
+    wide.insert(0, 'State', states)
+    return wide
+
+
+def build_store(tables, store_dir=STORE_DIR):
+    # Write tables (species -> (source, fingerprint, wide frame)) as a new store version.
+    # The manifest is replaced last, so readers see either the old or the new version.
+    import pandas as pd
+
+    state_names = sorted({state for _, _, wide in tables.values() for state in wide['State'].astype(str)})
+    state_index = {state: code for code, state in enumerate(state_names)}
+    manifest = {'format': FORMAT, 'version': time.strftime('%Y%m%d%H%M%S') + f'-{os.getpid()}',
+                'states': state_names, 'species': {}}
+
+    columns = {name: [] for name in ARRAYS}
+    offset = 0
+    for species, (source, fingerprint, wide) in tables.items():
+        year_columns = [str(column) for column in wide.columns[1:]]
+        years = pd.Index(year_columns).str.extract(r'(\d{4})', expand=False).astype(int).tolist()
+        raw = wide[wide.columns[1:]]
+        values = raw.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        status = np.where(raw.isna().to_numpy(), MISSING, np.where(np.isnan(values), NOT_A_NUMBER, VALID))
+        counts = np.where(status == VALID, np.round(values), 0).astype(np.int32)
+        codes = np.array([state_index[state] for state in wide['State'].astype(str)], dtype=np.int16)
+
+        columns['states'].append(np.repeat(codes, len(years)))
+        columns['years'].append(np.tile(np.array(years, dtype=np.int16), len(codes)))
+        columns['counts'].append(counts.ravel())
+        columns['status'].append(status.astype(np.int8).ravel())
+        manifest['species'][species] = {'source': source, 'fingerprint': fingerprint,
+                                        'year_columns': year_columns, 'years': years,
+                                        'start': offset, 'stop': offset + counts.size}
+        offset += counts.size
+
+    os.makedirs(store_dir, exist_ok=True)
+    for name, parts in columns.items():
+        path = os.path.join(store_dir, f'{name}-{manifest["version"]}.npy')
+        np.save(path, np.concatenate(parts))
+
+    manifest_path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    # Processes still mapping an older version keep their open files on POSIX
+    for path in glob.glob(os.path.join(store_dir, '*.npy')):
+        if not path.endswith(f'-{manifest["version"]}.npy'):
+            os.remove(path)
+    return manifest
+
+
+def refresh(store_dir=STORE_DIR):
+    # Re-import every species source; returns the new manifest
+    import data
+
+    tables = {}
+    for species, source in data.SOURCES.items():
+        tables[species] = (source, data._content_hash(source), data._read_source(source))
+    return build_store(tables, store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default=STORE_DIR, help='store directory')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = refresh(args.dir)
+    for species, entry in manifest['species'].items():
+        states = (entry['stop'] - entry['start']) // len(entry['years'])
+        print(f'{species}: {states} states x {len(entry["years"])} years from {entry["source"]}')
+    print(f'wrote {args.dir} version {manifest["version"]} in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
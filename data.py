@@ -0,0 +1,147 @@
+import glob
+import hashlib
+import importlib.util
+import os
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+import count_store
+from geo import attach_coordinates
+from species import BY_KEY
+from validation import clean_wide
+
+# Historic census files, one wide row per state and one column per census year
+SOURCES = {key: config.source for key, config in BY_KEY.items()}
+
+# Part of every Dataset fingerprint; bump it when the ingest cleaning rules change so that
+# forecasts and renders stored under the old fingerprint are not reused
+INGEST_VERSION = 1
+
+# Parsed copies of the sources are kept here as Parquet when pyarrow is installed
+CACHE_DIR = os.environ.get('DATA_CACHE_DIR', '.data_cache')
+
+_datasets = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Dataset:
+    species: str
+    source: str
+    fingerprint: str
+    # Wide table as shipped: State plus one numeric column per census year
+    wide: pd.DataFrame
+    # Tidy companion table: State, Year, Count
+    long: pd.DataFrame
+    # Census years in column order, and the wide column holding each one
+    years: tuple
+    year_columns: tuple
+    # Wide table with the gazetteer's Latitude/Longitude columns joined on
+    located: pd.DataFrame
+    # Validation findings from ingest: State, Year, Count, Issue
+    report: pd.DataFrame
+
+
+def _content_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def _read_source(path):
+    if path.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(path)
+    return pd.read_csv(path)
+
+
+def _parquet_enabled():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _parquet_copy(wide):
+    # Count columns mixing numbers and text (e.g. 'not surveyed') cannot be written to Parquet
+    # as they are. Store those cells as text and leave the coercion, and its validation
+    # report, to clean_wide as for a freshly parsed source.
+    copy = wide.copy()
+    copy.columns = [str(column) for column in copy.columns]
+    for column in copy.columns[copy.dtypes.eq(object)]:
+        values = copy[column]
+        copy[column] = values.where(values.isna(), values.astype(str))
+    return copy
+
+
+def _read_wide(species, path, fingerprint):
+    # Parse the source once per content hash; the xlsx is the slow one, so keep a Parquet copy
+    if not _parquet_enabled():
+        return _read_source(path)
+
+    cache_path = os.path.join(CACHE_DIR, f'{species}-{fingerprint}.parquet')
+    try:
+        return pd.read_parquet(cache_path)
+    except FileNotFoundError:
+        pass
+
+    wide = _read_source(path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Other processes may be sweeping at the same time, or have just written the fresh copy
+    for stale_path in glob.glob(os.path.join(CACHE_DIR, f'{species}-*.parquet')):
+        if os.path.abspath(stale_path) == os.path.abspath(cache_path):
+            continue
+        try:
+            os.remove(stale_path)
+        except FileNotFoundError:
+            pass
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    from pyarrow.lib import ArrowException
+    try:
+        _parquet_copy(wide).to_parquet(tmp_path, index=False)
+    except (ArrowException, ValueError, TypeError):
+        # Not representable in Parquet; clean_wide still validates the parsed frame, it just
+        # is not cached
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return wide
+    os.replace(tmp_path, cache_path)
+    return wide
+
+
+def _build_dataset(species, path, fingerprint):
+    # Prefer the shared memory-mapped store (python -m count_store) while it matches the source
+    wide = count_store.species_wide(species, fingerprint)
+    if wide is None:
+        wide = _read_wide(species, path, fingerprint)
+
+    # Validate and clean once per source version, instead of in every page loop
+    wide, report = clean_wide(wide)
+    year_columns = list(wide.columns[1:])
+    years = tuple(int(year) for year in pd.Index(year_columns).str.extract(r'(\d{4})', expand=False))
+
+    long = wide.melt(id_vars=['State'], var_name='Year', value_name='Count')
+    long['Year'] = long['Year'].map(dict(zip(year_columns, years))).astype(int)
+
+    return Dataset(species=species, source=path, fingerprint=f'{fingerprint}-v{INGEST_VERSION}', wide=wide,
+                   long=long, years=years, year_columns=tuple(year_columns),
+                   located=attach_coordinates(wide), report=report)
+
+
+def load_dataset(species):
+    # Return the cached Dataset for species, re-reading the source only when it changed on disk.
+    # The returned frames are shared between sessions and must not be modified in place.
+    path = SOURCES[species]
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        cached = _datasets.get(species)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        # The file was touched; only rebuild when its contents actually changed
+        fingerprint = _content_hash(path)
+        if cached is not None and cached[1].fingerprint == f'{fingerprint}-v{INGEST_VERSION}':
+            dataset = cached[1]
+        else:
+            dataset = _build_dataset(species, path, fingerprint)
+        _datasets[species] = (stamp, dataset)
+        return dataset
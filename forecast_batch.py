@@ -0,0 +1,53 @@
+"""Precompute species/state/year forecasts offline for the Streamlit pages.
+
+    python -m forecast_batch --start 2025 --end 2050 [--backend prophet --backend fast] [--out forecasts.sqlite]
+
+Loads every species dataset, forecasts every state for each year in the range (Prophet fits run
+in parallel through the forecasting pool) and writes one species/state/year/yhat/lower/upper
+table. When the table covers a requested year for the current dataset version, the pages read
+it instead of forecasting.
+"""
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+import forecast_store
+from data import SOURCES, load_dataset
+from forecasting import BACKENDS, FORECAST_START_YEAR, MAX_HORIZON_YEAR, forecast_ranges
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--species', action='append', choices=list(SOURCES),
+                        help='species to forecast (repeatable, default: all)')
+    parser.add_argument('--backend', action='append', choices=list(BACKENDS.values()),
+                        help='forecasting backend (repeatable, default: prophet)')
+    parser.add_argument('--start', type=int, default=2025)
+    parser.add_argument('--end', type=int, default=2050)
+    parser.add_argument('--out', default=forecast_store.STORE_PATH,
+                        help='output file, SQLite unless it ends in .parquet')
+    args = parser.parse_args()
+
+    if not FORECAST_START_YEAR <= args.start <= args.end <= MAX_HORIZON_YEAR:
+        parser.error(f'years must satisfy {FORECAST_START_YEAR} <= start <= end <= {MAX_HORIZON_YEAR}')
+
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    years = list(range(args.start, args.end + 1))
+
+    datasets = [load_dataset(species) for species in args.species or list(SOURCES)]
+    frames = []
+    for backend in args.backend or ['prophet']:
+        # Every species' fits go to the pool together
+        start = time.perf_counter()
+        frames.extend(forecast_ranges(datasets, years, backend))
+        rows = sum(len(frame) for frame in frames[-len(datasets):])
+        print(f'{backend}: {rows} rows for {len(datasets)} species in {time.perf_counter() - start:.2f}s')
+
+    forecast_store.write_forecasts(pd.concat(frames, ignore_index=True), args.out)
+    print(f'wrote {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import json
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# Base URL of a shared forecast_worker, e.g. http://127.0.0.1:8765; unset means in-process only
+WORKER_URL = os.environ.get('FORECAST_WORKER_URL', '')
+
+# Prophet fits for a cold species can take a while on the worker
+TIMEOUT_SECONDS = float(os.environ.get('FORECAST_WORKER_TIMEOUT', 120))
+
+# After a failed call, stay in-process for this long before trying the worker again
+RETRY_AFTER_SECONDS = 30
+
+_unavailable_until = 0.0
+
+
+def fetch_forecasts(dataset, future_year, backend):
+    # Ask the shared worker for (state, count) pairs. Returns None when no worker is configured,
+    # it cannot be reached, or it holds a different version of the dataset, so the caller can
+    # fall back to forecasting in-process.
+    global _unavailable_until
+    if not WORKER_URL or time.monotonic() < _unavailable_until:
+        return None
+
+    query = urllib.parse.urlencode({
+        'species': dataset.species,
+        'fingerprint': dataset.fingerprint,
+        'year': int(future_year),
+        'backend': backend,
+    })
+    try:
+        with urllib.request.urlopen(f'{WORKER_URL}/forecast?{query}', timeout=TIMEOUT_SECONDS) as response:
+            payload = json.load(response)
+    except urllib.error.HTTPError as exc:
+        # 409: the worker has another dataset version; not a reason to stop using it
+        if exc.code != 409:
+            _unavailable_until = time.monotonic() + RETRY_AFTER_SECONDS
+        return None
+    except (OSError, ValueError):
+        _unavailable_until = time.monotonic() + RETRY_AFTER_SECONDS
+        return None
+
+    return [(state, count) for state, count in payload['forecasts']]
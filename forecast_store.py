@@ -0,0 +1,63 @@
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+# Precomputed forecast table written by forecast_batch.py; SQLite unless the name ends in .parquet
+STORE_PATH = os.environ.get('FORECAST_STORE', 'forecasts.sqlite')
+
+COLUMNS = ['species', 'fingerprint', 'backend', 'state', 'year', 'yhat', 'yhat_lower', 'yhat_upper']
+
+
+def _is_parquet(path):
+    return path.endswith('.parquet')
+
+
+def write_forecasts(forecasts, path=STORE_PATH):
+    # Replace the stored rows for every (species, backend) present in forecasts
+    forecasts = forecasts[COLUMNS]
+    if _is_parquet(path):
+        if os.path.exists(path):
+            existing = pd.read_parquet(path)
+            replaced = existing.set_index(['species', 'backend']).index.isin(
+                forecasts.set_index(['species', 'backend']).index.unique())
+            forecasts = pd.concat([existing[~replaced], forecasts], ignore_index=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        forecasts.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return
+
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute('CREATE TABLE IF NOT EXISTS forecasts ('
+                     'species TEXT, fingerprint TEXT, backend TEXT, state TEXT, year INTEGER, '
+                     'yhat REAL, yhat_lower REAL, yhat_upper REAL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS forecasts_lookup ON forecasts (species, backend, year)')
+        for species, backend in forecasts[['species', 'backend']].drop_duplicates().itertuples(index=False):
+            conn.execute('DELETE FROM forecasts WHERE species = ? AND backend = ?', (species, backend))
+        conn.executemany(f'INSERT INTO forecasts VALUES ({", ".join("?" * len(COLUMNS))})',
+                         forecasts.to_numpy(dtype=object).tolist())
+
+
+def read_forecasts(species, fingerprint, backend, year, path=STORE_PATH):
+    # Stored State/yhat/yhat_lower/yhat_upper rows for one species and year, or None when the
+    # store is missing, does not cover the year, or was computed from another dataset version
+    if not os.path.exists(path):
+        return None
+
+    if _is_parquet(path):
+        rows = pd.read_parquet(path, filters=[('species', '==', species), ('backend', '==', backend),
+                                              ('year', '==', year), ('fingerprint', '==', fingerprint)])
+    else:
+        with closing(sqlite3.connect(f'file:{path}?mode=ro', uri=True)) as conn:
+            try:
+                rows = pd.read_sql_query(
+                    'SELECT state, yhat, yhat_lower, yhat_upper FROM forecasts '
+                    'WHERE species = ? AND backend = ? AND year = ? AND fingerprint = ?',
+                    conn, params=(species, backend, int(year), fingerprint))
+            except pd.errors.DatabaseError:
+                return None
+
+    if rows.empty:
+        return None
+    return rows.rename(columns={'state': 'State'})[['State', 'yhat', 'yhat_lower', 'yhat_upper']]
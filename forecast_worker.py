@@ -0,0 +1,103 @@
+"""Shared forecast worker for multi-user deployments.
+
+    python -m forecast_worker [--host 127.0.0.1] [--port 8765] [--warmup]
+
+Owns the fitted models and forecast tables for every session of every app server that sets
+FORECAST_WORKER_URL=http://127.0.0.1:8765. Identical requests that arrive while a forecast
+is already running wait for that computation instead of starting their own; GET /stats
+reports the hit/join/miss counters and the --warmup progress and, with APP_INSTRUMENTATION=1,
+GET /metrics the stage timings in Prometheus text format.
+"""
+import argparse
+import json
+import logging
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import instrumentation
+import warmup
+from data import SOURCES, load_dataset
+from forecasting import BACKENDS, forecast_flights, iter_state_forecasts
+
+
+def forecast(dataset, year, backend):
+    # Identical concurrent requests share one computation through the forecasting single-flight layer
+    key = (dataset.species, dataset.fingerprint, year, backend)
+    results, _ = forecast_flights.do(key, lambda: iter_state_forecasts(dataset, year, backend))
+    return [(state, float(count)) for state, count in results]
+
+
+class ForecastHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/stats':
+            self._send(200, dict(forecast_flights.stats(), warmup=warmup.status()))
+            return
+        if url.path == '/metrics':
+            body = instrumentation.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if url.path != '/forecast':
+            self._send(404, {'error': 'not found'})
+            return
+
+        params = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            species = params['species']
+            year = int(params['year'])
+            backend = params.get('backend', 'prophet')
+            if species not in SOURCES or backend not in BACKENDS.values():
+                raise ValueError(f'unknown species or backend: {species}, {backend}')
+        except (KeyError, ValueError) as exc:
+            self._send(400, {'error': str(exc)})
+            return
+
+        dataset = load_dataset(species)
+        if params.get('fingerprint', dataset.fingerprint) != dataset.fingerprint:
+            self._send(409, {'error': 'dataset version mismatch', 'fingerprint': dataset.fingerprint})
+            return
+
+        try:
+            forecasts = forecast(dataset, year, backend)
+        except ValueError as exc:
+            self._send(400, {'error': str(exc)})
+            return
+        self._send(200, {'species': species, 'fingerprint': dataset.fingerprint, 'year': year,
+                         'backend': backend, 'forecasts': forecasts})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger('forecast_worker').info(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--warmup', action='store_true',
+                        help='fit every species in the background at startup and after data changes')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    if args.warmup:
+        warmup.start()
+    server = ThreadingHTTPServer((args.host, args.port), ForecastHandler)
+    print(f'forecast worker listening on http://{args.host}:{args.port}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+import atexit
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import forecast_client
+import instrumentation
+import forecast_store
+import model_store
+import trend
+from lru import LRUCache
+from singleflight import SingleFlight
+from validation import MIN_HISTORY
+
+# Forecasts always start from the year after the last shipped census window
+FORECAST_START_YEAR = 2023
+
+# Bump when the forecast models change, so forecasts that forecast_batch stored under an
+# older model are not served next to live ones. 2: logistic Prophet growth between each
+# state's trend.count_bounds. 3: intervals held within the same bounds.
+MODEL_VERSION = 3
+
+# Every fit is predicted once out to this year; later requests only index into the table
+MAX_HORIZON_YEAR = int(os.environ.get('FORECAST_MAX_YEAR', 2100))
+
+# Per-state forecast tables keyed by (species, state, history hash)
+_tables = LRUCache(maxsize=int(os.environ.get('FORECAST_TABLE_CACHE_SIZE', 256)))
+
+# Per-state Prophet histories keyed by (species, dataset fingerprint)
+_histories = LRUCache(maxsize=16)
+
+# Single-flight layer for forecast_states keyed by (species, fingerprint, year, backend);
+# forecast_flights.stats() reports its hit/join/miss counters, which are also exported as metrics
+forecast_flights = SingleFlight(cache_size=64)
+instrumentation.register_stats('forecast_flights', forecast_flights.stats)
+
+# UI label -> backend name accepted by forecast_states
+BACKENDS = {
+    'Prophet': 'prophet',
+    'Fast trend (linear/logistic)': 'fast',
+}
+
+_executor = None
+
+
+def _get_executor():
+    # One pool per server process, sized to the cores and reused across reruns
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context('spawn'))
+        atexit.register(_executor.shutdown, wait=False, cancel_futures=True)
+    return _executor
+
+
+def store_fingerprint(dataset):
+    # Version of the rows forecast_store keeps for dataset: its data version plus MODEL_VERSION
+    return f'{dataset.fingerprint}-m{MODEL_VERSION}'
+
+
+def state_histories(df):
+    # Reshape the wide census table into one Prophet ds/y/cap/floor frame per state with a
+    # single melt. cap and floor are the state's trend.count_bounds, for logistic growth.
+    long_df = df.melt(id_vars=['State'], var_name='Year', value_name='y')
+    years = long_df['Year'].str.extract(r'(\d{4})', expand=False).astype(int)
+    long_df['ds'] = pd.to_datetime(years.astype(str), format='%Y')
+    # melt stacks the year columns one after another, so the bounds repeat once per year
+    floor, cap = trend.count_bounds(trend.census_matrix(df)[1])
+    long_df['cap'] = np.tile(cap[:, 0], len(df.columns) - 1)
+    long_df['floor'] = np.tile(floor[:, 0], len(df.columns) - 1)
+    return {state: group[['ds', 'y', 'cap', 'floor']].reset_index(drop=True)
+            for state, group in long_df.groupby('State', sort=False)}
+
+
+def new_model():
+    # An unfitted Prophet model as the app fits it: logistic growth between the cap and floor
+    # columns of the history, so forecasts stay within the state's bounds. Census years are
+    # annual, so there is no yearly seasonality to fit, and its additive term would push
+    # forecasts past the bounds.
+    from prophet import Prophet
+
+    return Prophet(growth='logistic', yearly_seasonality=False)
+
+
+def predict_model(model, history, dates):
+    # Prophet forecast of a new_model fitted on history for dates, under the history's bounds
+    future = pd.DataFrame({'ds': dates, 'cap': history['cap'].iloc[0], 'floor': history['floor'].iloc[0]})
+    # A steep logistic trend overflows exp() far out in the horizon, where it has reached its
+    # cap or floor anyway
+    with np.errstate(over='ignore'):
+        return model.predict(future)
+
+
+def fits_prophet(history):
+    # Prophet needs at least MIN_HISTORY counts; clean_wide reports the states with fewer
+    return history['y'].notna().sum() >= MIN_HISTORY
+
+
+def flat_table(history, years):
+    # Forecast table for a state Prophet cannot fit: its known level (0 without any count)
+    # carried forward, with no interval around it
+    level = history['y'].mean()
+    level = 0.0 if pd.isna(level) else float(level)
+    return pd.DataFrame({'yhat': level, 'yhat_lower': level, 'yhat_upper': level},
+                        index=pd.Index(years, name='Year'))
+
+
+def _warm_start_params(model):
+    # Initial values for a refit, taken from a model fitted on an earlier version of the
+    # history. Prophet falls back to its default init for any parameter whose shape changed,
+    # e.g. the changepoint deltas once a census year adds a changepoint.
+    params = {name: model.params[name][0][0] for name in ('k', 'm', 'sigma_obs')}
+    params.update({name: model.params[name][0] for name in ('delta', 'beta')})
+    return params
+
+
+def _fit_model(species, state, history):
+    # Return (model, stage, seconds): the stored model for this exact history ('model_load'),
+    # a refit warm-started from the state's previous model ('prophet_warm_fit'), or a fit
+    # from scratch ('prophet_fit'). New fits are stored.
+    start = time.perf_counter()
+    model = model_store.load_model(species, state, history)
+    if model is not None:
+        return model, 'model_load', time.perf_counter() - start
+
+    stage = 'prophet_fit'
+    previous = model_store.load_previous_model(species, state, history)
+    # Parameters of a model with another growth mode mean something else; fit those afresh
+    if previous is not None and previous.growth == 'logistic':
+        try:
+            model = new_model().fit(history, init=_warm_start_params(previous))
+            stage = 'prophet_warm_fit'
+        except (RuntimeError, ValueError):
+            model = None
+    if model is None:
+        model = new_model().fit(history)
+    model_store.save_model(species, state, history, model)
+    return model, stage, time.perf_counter() - start
+
+
+def _refresh_model(species, state, history):
+    # Runs in a pool worker for refresh_models
+    _, stage, seconds = _fit_model(species, state, history)
+    return state, stage, seconds
+
+
+def _forecast_table(species, state, history):
+    # Runs in a pool worker; Prophet (and cmdstanpy) only load once a fit is actually needed.
+    # Returns the stage timings too, so the parent process can record them.
+    model, stage, seconds = _fit_model(species, state, history)
+    timings = {stage: seconds}
+
+    # Predict once for every year-end out to the maximum horizon
+    start = time.perf_counter()
+    years = range(FORECAST_START_YEAR, MAX_HORIZON_YEAR + 1)
+    forecast = predict_model(model, history, pd.to_datetime([f'{year}-12-31' for year in years]))
+    timings['prophet_predict'] = time.perf_counter() - start
+
+    # yhat stays within the bounds through the logistic fit, but the interval adds Prophet's
+    # observation noise on top of the trend, so hold it within the state's bounds too
+    table = forecast[['yhat', 'yhat_lower', 'yhat_upper']].copy()
+    table[['yhat_lower', 'yhat_upper']] = table[['yhat_lower', 'yhat_upper']].clip(
+        history['floor'].iloc[0], history['cap'].iloc[0])
+    table.index = pd.Index(years, name='Year')
+    return state, table, timings
+
+
+def _dataset_histories(dataset):
+    # Per-state histories and their hashes, computed once per dataset version
+    key = (dataset.species, dataset.fingerprint)
+    cached = _histories.get(key)
+    if cached is None:
+        histories = state_histories(dataset.wide)
+        cached = (histories, {state: model_store.history_hash(history) for state, history in histories.items()})
+        model_store.sync_source(dataset.species, dataset.source, histories)
+        _histories.put(key, cached)
+    return cached
+
+
+def _iter_tables(datasets, executor=None):
+    # Yield (dataset index, state, forecast table) for every state of every dataset: cached
+    # tables first, then the pool's fits as each one finishes. The pending fits of all
+    # datasets are submitted together, so different species share the pool.
+    pending = {}
+    for index, dataset in enumerate(datasets):
+        histories, hashes = _dataset_histories(dataset)
+        for state, history in histories.items():
+            key = (dataset.species, state, hashes[state])
+            table = _tables.get(key)
+            if table is None and not fits_prophet(history):
+                table = flat_table(history, range(FORECAST_START_YEAR, MAX_HORIZON_YEAR + 1))
+                _tables.put(key, table)
+            if table is None:
+                pending[index, state] = (key, history)
+            else:
+                yield index, state, table
+
+    if not pending:
+        return
+
+    executor = executor or _get_executor()
+    futures = {executor.submit(_forecast_table, datasets[index].species, state, history): index
+               for (index, state), (key, history) in pending.items()}
+    try:
+        for future in as_completed(futures):
+            index = futures[future]
+            state, table, timings = future.result()
+            for stage, seconds in timings.items():
+                instrumentation.record(stage, seconds, species=datasets[index].species, state=state)
+            _tables.put(pending[index, state][0], table)
+            yield index, state, table
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def iter_state_tables(dataset, executor=None):
+    # Yield (state, forecast table) for every state of one dataset. executor defaults to the
+    # shared forecasting pool.
+    for _, state, table in _iter_tables([dataset], executor):
+        yield state, table
+
+
+def refresh_models(dataset):
+    # Fit only the states whose history hash has no stored model, warm-starting each from its
+    # previous model. Returns {state: (stage, seconds)} for the rebuilt states and the list
+    # of states whose model was already current, or that have too few counts for one.
+    species = dataset.species
+    histories, _ = _dataset_histories(dataset)
+    stale = {state: history for state, history in histories.items()
+             if fits_prophet(history) and not model_store.has_model(species, state, history)}
+    unchanged = [state for state in histories if state not in stale]
+
+    rebuilt = {}
+    executor = _get_executor()
+    futures = [executor.submit(_refresh_model, species, state, history) for state, history in stale.items()]
+    for future in as_completed(futures):
+        state, stage, seconds = future.result()
+        instrumentation.record(stage, seconds, species=species, state=state)
+        rebuilt[state] = (stage, seconds)
+    return rebuilt, unchanged
+
+
+def iter_state_forecasts(dataset, future_year, backend='prophet'):
+    # Yield (state, count) for future_year, either by indexing into each state's Prophet
+    # forecast table or from the vectorized trend fit over all states at once. Both backends
+    # fit trends bounded by trend.count_bounds, so counts are never negative.
+    if not FORECAST_START_YEAR <= future_year <= MAX_HORIZON_YEAR:
+        raise ValueError(f'future_year must be between {FORECAST_START_YEAR} and {MAX_HORIZON_YEAR}')
+
+    # Prefer the offline batch table when it covers this dataset version and year
+    stored = forecast_store.read_forecasts(dataset.species, store_fingerprint(dataset), backend, future_year)
+    if stored is not None:
+        yield from zip(stored['State'], stored['yhat'].to_numpy())
+    elif backend == 'fast':
+        with instrumentation.span('fast_forecast', species=dataset.species):
+            yhat, _, _ = trend.forecast_matrix(dataset.wide, [future_year],
+                                               horizon=(FORECAST_START_YEAR, MAX_HORIZON_YEAR))
+        yield from zip(dataset.wide['State'], yhat[:, 0])
+    elif backend == 'prophet':
+        for state, table in iter_state_tables(dataset):
+            yield state, table.at[future_year, 'yhat']
+    else:
+        raise ValueError(f'Unknown forecasting backend: {backend}')
+
+
+def forecast_ranges(datasets, years, backend='prophet'):
+    # One long species/fingerprint/backend/state/year/yhat/yhat_lower/yhat_upper frame per
+    # dataset: one fit per state (or one vectorized fit per dataset) and one predict covering
+    # every year. Prophet fits for all datasets run in the pool as one batch.
+    if backend == 'fast':
+        forecasts = []
+        for dataset in datasets:
+            with instrumentation.span('fast_forecast', species=dataset.species):
+                forecasts.append(trend.forecast_frame(dataset.wide, years,
+                                                      horizon=(FORECAST_START_YEAR, MAX_HORIZON_YEAR)))
+    elif backend == 'prophet':
+        tables = [[] for _ in datasets]
+        for index, state, table in _iter_tables(datasets):
+            table = table.loc[years[0]:years[-1]].reset_index()
+            table.insert(0, 'State', state)
+            tables[index].append(table)
+        forecasts = [pd.concat(parts, ignore_index=True) for parts in tables]
+    else:
+        raise ValueError(f'Unknown forecasting backend: {backend}')
+
+    frames = []
+    for dataset, frame in zip(datasets, forecasts):
+        frame = frame.rename(columns={'State': 'state', 'Year': 'year'})
+        frame.insert(0, 'species', dataset.species)
+        frame.insert(1, 'fingerprint', store_fingerprint(dataset))
+        frame.insert(2, 'backend', backend)
+        frames.append(frame)
+    return frames
+
+
+def forecast_range(dataset, years, backend='prophet'):
+    # forecast_ranges for a single dataset
+    return forecast_ranges([dataset], years, backend)[0]
+
+
+def forecast_cube(datasets, start_year, end_year, backend='prophet'):
+    # Forecast every state of every dataset for each year in start_year..end_year in one call,
+    # e.g. forecast_cube([load_dataset(s) for s in SOURCES], 2025, 2050). backend may also be
+    # a list of backends to compare. Returns one long
+    # species/backend/state/year/yhat/yhat_lower/yhat_upper frame.
+    if not FORECAST_START_YEAR <= start_year <= end_year <= MAX_HORIZON_YEAR:
+        raise ValueError(f'years must satisfy {FORECAST_START_YEAR} <= start <= end <= {MAX_HORIZON_YEAR}')
+    years = list(range(start_year, end_year + 1))
+    backends = [backend] if isinstance(backend, str) else list(backend)
+    frames = [frame for name in backends for frame in forecast_ranges(datasets, years, name)]
+    cube = pd.concat(frames, ignore_index=True)
+    return cube.drop(columns=['fingerprint'])
+
+
+def forecast_states(dataset, value_name, future_year, on_result=None, backend='prophet'):
+    # Collect the per-state forecasts into the future_df the species pages map from.
+    # A shared forecast worker is used when one is configured and reachable; otherwise
+    # concurrent identical requests in this process share one computation.
+    results = forecast_client.fetch_forecasts(dataset, future_year, backend)
+    if results is None:
+        # Each caller streams to its own on_result; a caller that takes over an interrupted
+        # computation restarts it, so states already shown are not reported twice
+        shown = set()
+
+        def show(result):
+            if on_result is not None and result[0] not in shown:
+                shown.add(result[0])
+                on_result(*result)
+
+        key = (dataset.species, dataset.fingerprint, future_year, backend)
+        results, _ = forecast_flights.do(key, lambda: iter_state_forecasts(dataset, future_year, backend),
+                                         on_item=show)
+    elif on_result is not None:
+        for state, count in results:
+            on_result(state, count)
+
+    # Keep the original state order and only the states whose count rounds to at least one
+    # animal; logistic trends approach zero without reaching it
+    counts = dict(results)
+    future_data = [{'State': state, 'Year': future_year, value_name: counts[state]}
+                   for state in dataset.wide['State'].unique() if round(float(counts[state])) >= 1]
+    return pd.DataFrame(future_data, columns=['State', 'Year', value_name])
@@ -0,0 +1,61 @@
+import pandas as pd
+
+# Fallback location (centre of India) for states missing from the gazetteer
+DEFAULT_LOCATION = (20.5937, 78.9629)
+
+# State -> (latitude, longitude) used to place the map markers
+STATE_LOCATIONS = {
+    'Andhra Pradesh': (15.9129, 79.7400),
+    'Arunachal Pradesh': (27.1137, 93.6054),
+    'Assam': (26.2006, 92.9376),
+    'Bihar': (25.0961, 85.3131),
+    'Chhattisgarh': (21.2787, 81.8661),
+    'Goa': (15.2993, 74.1240),
+    'Gujarat': (22.2587, 71.1924),
+    'Jharkhand': (23.6102, 85.2799),
+    'Karnataka': (15.3173, 75.7139),
+    'Kerala': (10.8505, 76.2711),
+    'Madhya Pradesh': (23.4734, 77.9479),
+    'Maharashtra': (19.6633, 75.3202),
+    'Meghalaya': (25.4670, 91.3662),
+    'Mizoram': (23.1645, 92.9376),
+    'Nagaland': (26.1584, 94.5624),
+    'Odisha': (20.9517, 85.0985),
+    'Rajasthan': (27.0238, 74.2176),
+    'Tamil Nadu': (11.1271, 78.6569),
+    'Telangana': (17.0220, 78.3555),
+    'Tripura': (23.9408, 91.9882),
+    'Uttar Pradesh': (27.2599, 79.4126),
+    'Uttarakhand': (30.0668, 79.0193),
+    'West Bengal': (22.9868, 87.8550),
+    'Sikkim': (27.5330, 88.6139),
+    'Jammu & Kashmir': (33.2778, 76.5765),
+    'Punjab': (31.1471, 75.3412),
+    'Haryana': (29.0588, 76.0856),
+    'Himachal Pradesh': (31.1048, 77.1734),
+    'Manipur': (24.6637, 93.9063),
+    'Andaman & Nicobar Islands': (11.7401, 92.6586),
+}
+
+
+def normalize_state_names(names):
+    # Collapse stray whitespace and case so 'West Bengal ' and 'west  bengal' share one key
+    return pd.Series(names).str.strip().str.replace(r'\s+', ' ', regex=True).str.casefold()
+
+
+# Built once at import, keyed by normalized name
+_GAZETTEER = pd.DataFrame(
+    list(STATE_LOCATIONS.values()),
+    columns=['Latitude', 'Longitude'],
+    index=normalize_state_names(list(STATE_LOCATIONS)).to_numpy(),
+)
+
+
+def attach_coordinates(df):
+    # Return a copy of df with Latitude/Longitude columns joined on its State column
+    keys = normalize_state_names(df['State']).to_numpy()
+    coordinates = _GAZETTEER.reindex(keys)
+    located = df.copy()
+    located['Latitude'] = coordinates['Latitude'].fillna(DEFAULT_LOCATION[0]).to_numpy()
+    located['Longitude'] = coordinates['Longitude'].fillna(DEFAULT_LOCATION[1]).to_numpy()
+    return located
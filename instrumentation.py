@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Process-wide collection for metrics export; set APP_INSTRUMENTATION=1 to enable.
+# Without it, only reruns with the sidebar timing panel switched on are timed.
+enabled = os.environ.get('APP_INSTRUMENTATION', '0') == '1'
+
+# Also emit one structured (JSON) log line per span while enabled
+log_spans = os.environ.get('APP_INSTRUMENTATION_LOG', '0') == '1'
+
+logger = logging.getLogger('instrumentation')
+
+# Process-wide totals per stage: name -> [count, total seconds]
+_totals = {}
+_lock = threading.Lock()
+
+# Spans recorded during the current Streamlit rerun (one list per script thread)
+_local = threading.local()
+
+# name -> callable returning {stat: number}, exported alongside the stage totals
+_stats = {}
+
+
+class _NullSpan:
+    # Returned while disabled so instrumented code pays for a single attribute check
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def active():
+    # Collecting either for the whole process or for the current rerun (sidebar toggle)
+    return enabled or getattr(_local, 'spans', None) is not None
+
+
+def span(name, **labels):
+    # Time the enclosed block as stage name, e.g. with span('map_build', species='tigers'):
+    if not active():
+        return _NULL_SPAN
+    return _timed_span(name, labels)
+
+
+@contextmanager
+def _timed_span(name, labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, **labels)
+
+
+def record(name, seconds, **labels):
+    # Record an already measured duration, e.g. a fit timed inside a pool worker
+    if not active():
+        return
+    with _lock:
+        totals = _totals.setdefault(name, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+    spans = getattr(_local, 'spans', None)
+    if spans is not None:
+        spans.append((name, labels, seconds))
+    if log_spans:
+        logger.info(json.dumps({'span': name, 'seconds': round(seconds, 6), **labels}))
+
+
+def start_rerun(collect):
+    # Begin a script run on this thread; collect its spans for the timing panel if requested
+    _local.spans = [] if collect else None
+
+
+def rerun_spans():
+    # (name, labels, seconds) for every span recorded since start_rerun on this thread
+    return list(getattr(_local, 'spans', None) or [])
+
+
+def register_stats(name, collect):
+    # Export collect()'s numbers as app_<name>_<stat> gauges, e.g. a SingleFlight's
+    # hit/join/miss counters, so they are visible without the forecast worker
+    with _lock:
+        _stats[name] = collect
+
+
+def current_stats():
+    # name -> {stat: number} for every registered source
+    with _lock:
+        sources = sorted(_stats.items())
+    return {name: collect() for name, collect in sources}
+
+
+def prometheus_text():
+    # Process-wide totals in the Prometheus text exposition format
+    lines = [
+        '# HELP app_stage_seconds_total Time spent in each instrumented stage.',
+        '# TYPE app_stage_seconds_total counter',
+    ]
+    with _lock:
+        totals = sorted(_totals.items())
+    for name, (_, seconds) in totals:
+        lines.append(f'app_stage_seconds_total{{stage="{name}"}} {seconds:.6f}')
+    lines += [
+        '# HELP app_stage_calls_total Number of times each instrumented stage ran.',
+        '# TYPE app_stage_calls_total counter',
+    ]
+    for name, (count, _) in totals:
+        lines.append(f'app_stage_calls_total{{stage="{name}"}} {count}')
+    for name, stats in current_stats().items():
+        for stat, value in stats.items():
+            lines += [f'# TYPE app_{name}_{stat} gauge', f'app_{name}_{stat} {value}']
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,161 @@
+import os
+
+import folium
+import numpy as np
+from branca.element import MacroElement
+from jinja2 import Template
+
+# Count thresholds separating the high / medium / low colour buckets
+THRESHOLDS = (200, 50)
+
+# Layers with more points than this are pre-clustered on a grid per zoom level, so the map
+# HTML is bounded by the grid size instead of growing with the number of points
+CLUSTER_THRESHOLD = int(os.environ.get('MAP_CLUSTER_THRESHOLD', 500))
+
+# Zoom levels that get their own clustering; zooming beyond the last keeps its clusters
+CLUSTER_ZOOMS = range(4, 8)
+
+# Grid cell edge in screen pixels at each zoom level
+CLUSTER_CELL_PIXELS = 80
+
+
+class CountLayer(MacroElement):
+    # One GeoJSON FeatureCollection for all markers; the browser expands each feature into
+    # a bubble plus its count label instead of shipping a CircleMarker and DivIcon per state
+    _template = Template('''
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = L.geoJson({{ this.data|tojson }}, {
+            pointToLayer: function(feature, latlng) {
+                var props = feature.properties;
+                var bubble = L.circleMarker(latlng, {
+                    radius: {{ this.radius }}, color: props.color, fill: true,
+                    fillColor: props.color, fillOpacity: 0.8
+                });
+                var label = L.marker(latlng, {icon: L.divIcon({
+                    className: 'empty',
+                    html: '<div style="' + {{ this.label_style|tojson }} + '">' + props.label + '</div>'
+                })});
+                return L.featureGroup([bubble, label]);
+            }
+        }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    ''')
+
+    def __init__(self, data, radius, label_style):
+        super().__init__()
+        self._name = 'CountLayer'
+        self.data = data
+        self.radius = radius
+        self.label_style = label_style
+
+
+class ClusterLayer(MacroElement):
+    # One FeatureCollection per zoom level; the browser swaps in the matching one on zoom
+    _template = Template('''
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function(map) {
+            var levels = {{ this.data|tojson }};
+            var group = L.layerGroup().addTo(map);
+            function draw() {
+                var zoom = Math.max({{ this.min_zoom }}, Math.min({{ this.max_zoom }}, map.getZoom()));
+                group.clearLayers();
+                L.geoJson(levels[zoom], {
+                    pointToLayer: function(feature, latlng) {
+                        var props = feature.properties;
+                        var bubble = L.circleMarker(latlng, {
+                            radius: {{ this.radius }}, color: props.color, fill: true,
+                            fillColor: props.color, fillOpacity: 0.8
+                        }).bindTooltip(props.state);
+                        var label = L.marker(latlng, {icon: L.divIcon({
+                            className: 'empty',
+                            html: '<div style="' + {{ this.label_style|tojson }} + '">' + props.label + '</div>'
+                        })});
+                        return L.featureGroup([bubble, label]);
+                    }
+                }).addTo(group);
+            }
+            map.on('zoomend', draw);
+            draw();
+            return group;
+        })({{ this._parent.get_name() }});
+        {% endmacro %}
+    ''')
+
+    def __init__(self, data, radius, label_style):
+        super().__init__()
+        self._name = 'ClusterLayer'
+        self.data = data
+        self.radius = radius
+        self.label_style = label_style
+        self.min_zoom = min(int(zoom) for zoom in data)
+        self.max_zoom = max(int(zoom) for zoom in data)
+
+
+def _feature_collection(lat, lon, counts, names, colors, thresholds):
+    # Colours and labels are computed column-wise for the whole layer
+    high, medium = thresholds
+    color = np.select([counts > high, counts > medium], colors[:2], default=colors[2])
+    label = np.round(counts).astype(np.int64).astype(str)
+
+    features = [
+        {'type': 'Feature',
+         'geometry': {'type': 'Point', 'coordinates': [x, y]},
+         'properties': {'state': s, 'color': c, 'label': l}}
+        for x, y, s, c, l in zip(lon.tolist(), lat.tolist(), names.tolist(), color.tolist(), label.tolist())
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def _positive_points(located, count_column):
+    # Only counts whose rounded label is at least 1; a forecast that approaches zero would
+    # otherwise draw a bubble labelled "0"
+    counts = located[count_column].to_numpy(dtype=float)
+    keep = np.round(counts) >= 1
+    return (located['Latitude'].to_numpy(dtype=float)[keep], located['Longitude'].to_numpy(dtype=float)[keep],
+            counts[keep], located['State'].to_numpy()[keep])
+
+
+def count_features(located, count_column, colors, thresholds=THRESHOLDS):
+    # Build the FeatureCollection for every positive count in located (a frame with
+    # Latitude/Longitude columns)
+    lat, lon, counts, names = _positive_points(located, count_column)
+    return _feature_collection(lat, lon, counts, names, colors, thresholds)
+
+
+def cluster_features(located, count_column, colors, thresholds=THRESHOLDS, zooms=CLUSTER_ZOOMS):
+    # zoom -> FeatureCollection of grid clusters. Each cluster sits at the count-weighted centre
+    # of its points and is labelled with their total count.
+    lat, lon, counts, _ = _positive_points(located, count_column)
+    # Web Mercator y in degrees, so cells are square on screen at every latitude
+    y = np.degrees(np.log(np.tan(np.pi / 4 + np.radians(np.clip(lat, -85, 85)) / 2)))
+
+    levels = {}
+    for zoom in zooms:
+        cell = 360 / (256 * 2 ** zoom) * CLUSTER_CELL_PIXELS
+        # One int64 key per grid cell; unique on a flat key is much faster than on rows
+        cells = np.floor(lon / cell).astype(np.int64) * (1 << 32) + np.floor(y / cell).astype(np.int64)
+        _, cluster, sizes = np.unique(cells, return_inverse=True, return_counts=True)
+        totals = np.bincount(cluster, weights=counts)
+        names = np.array([f'{size} regions' if size > 1 else '1 region' for size in sizes.tolist()], dtype=object)
+        levels[str(zoom)] = _feature_collection(np.bincount(cluster, weights=lat * counts) / totals,
+                                                np.bincount(cluster, weights=lon * counts) / totals,
+                                                totals, names, colors, thresholds)
+    return levels
+
+
+def add_count_layer(folium_map, located, count_column, colors, font_size, label_width,
+                    thresholds=THRESHOLDS, radius=20):
+    label_style = (f'text-align: left; font-size: {font_size}pt; font-weight: bold; '
+                   f'width:{label_width}px; color: black;')
+    if (located[count_column].to_numpy(dtype=float) > 0).sum() > CLUSTER_THRESHOLD:
+        data = cluster_features(located, count_column, colors, thresholds)
+        ClusterLayer(data, radius, label_style).add_to(folium_map)
+    else:
+        data = count_features(located, count_column, colors, thresholds)
+        CountLayer(data, radius, label_style).add_to(folium_map)
+    return folium_map
+
+
+def base_map():
+    # Create a map centered around India
+    return folium.Map(location=[17.5937, 82.9629], zoom_start=5, width=1300, height=800)
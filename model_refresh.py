@@ -0,0 +1,50 @@
+"""Refresh the stored Prophet models after the census sources change.
+
+    python -m model_refresh [--species leopards ...] [--json]
+
+Hashes every state's history and refits only the states without a stored model for that
+hash, e.g. after a new census column is appended. Each refit is warm-started from the
+state's previous model when one is kept. Reports which models were rebuilt (warm or cold)
+and how many were already current, so nightly runs cost time in proportion to the change.
+"""
+import argparse
+import json
+import logging
+import time
+
+from data import SOURCES, load_dataset
+from forecasting import refresh_models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--species', action='append', choices=sorted(SOURCES),
+                        help='species to refresh (repeatable, default all)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    report = {}
+    for species in args.species or list(SOURCES):
+        start = time.perf_counter()
+        rebuilt, unchanged = refresh_models(load_dataset(species))
+        report[species] = {
+            'rebuilt': {state: {'fit': 'warm' if stage == 'prophet_warm_fit' else 'cold',
+                                'seconds': round(seconds, 3)}
+                        for state, (stage, seconds) in sorted(rebuilt.items())},
+            'unchanged': len(unchanged),
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for species, entry in report.items():
+        print(f'{species}: {len(entry["rebuilt"])} rebuilt, {entry["unchanged"]} unchanged '
+              f'in {entry["seconds"]:.2f}s')
+        for state, fit in entry['rebuilt'].items():
+            print(f'  {state}: {fit["fit"]} fit, {fit["seconds"]:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import glob
+import hashlib
+import json
+import os
+import re
+
+# Fitted Prophet models live under this directory, one sub-directory per species
+CACHE_DIR = os.environ.get('MODEL_CACHE_DIR', '.model_cache')
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def history_hash(history):
+    # Fingerprint of one state's ds/y rows; any change to the history changes the key.
+    # Rows without a count are ignored like Prophet ignores them, so a census column that
+    # is still empty for a state does not make its model stale. Counts hash as floats, since
+    # one empty cell anywhere in the file turns the whole count column into floats. The
+    # logistic cap/floor columns are part of the key, so models fitted without them are refit.
+    columns = [column for column in ('ds', 'y', 'cap', 'floor') if column in history]
+    history = history[columns].dropna(subset=['y']).astype({'y': float})
+    payload = history.to_csv(index=False).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def _species_dir(species):
+    return os.path.join(CACHE_DIR, species)
+
+
+def _slug(state):
+    return re.sub(r'[^a-z0-9]+', '-', state.strip().lower()).strip('-')
+
+
+def _state_slug(name):
+    # 'west-bengal-0123456789abcdef.json' -> 'west-bengal'
+    return name[:-len('.json')].rsplit('-', 1)[0]
+
+
+def _model_path(species, state, fingerprint):
+    return os.path.join(_species_dir(species), f'{_slug(state)}-{fingerprint}.json')
+
+
+def _mtime(path):
+    # Another process or thread may evict the file at any time; treat it as the oldest
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+
+def _write_atomic(path, text):
+    # Several pool workers write into the same directory, so never leave half-written files
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def load_model(species, state, history):
+    # Prophet is imported on first use so importing this module stays cheap
+    from prophet.serialize import model_from_json
+
+    path = _model_path(species, state, history_hash(history))
+    try:
+        with open(path, encoding='utf-8') as f:
+            return model_from_json(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def has_model(species, state, history):
+    return os.path.exists(_model_path(species, state, history_hash(history)))
+
+
+def load_previous_model(species, state, history):
+    # The state's model for an earlier version of its history, kept by sync_source so the
+    # refit can be warm-started from its parameters; None if there is none
+    from prophet.serialize import model_from_json
+
+    current = _model_path(species, state, history_hash(history))
+    candidates = [path for path in glob.glob(os.path.join(_species_dir(species), f'{_slug(state)}-*.json'))
+                  if path != current and _state_slug(os.path.basename(path)) == _slug(state)]
+    for path in sorted(candidates, key=_mtime, reverse=True):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return model_from_json(f.read())
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def save_model(species, state, history, model):
+    from prophet.serialize import model_to_json
+
+    os.makedirs(_species_dir(species), exist_ok=True)
+    _write_atomic(_model_path(species, state, history_hash(history)), model_to_json(model))
+
+
+def _source_fingerprint(source):
+    stat = os.stat(source)
+    return {'source': os.path.abspath(source), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def sync_source(species, source, histories):
+    # Evict the models of states whose history no longer matches the source file, keeping
+    # one outdated model per state to warm-start its refit from.
+    # histories maps state -> ds/y frame for the current contents of source.
+    species_dir = _species_dir(species)
+    manifest_path = os.path.join(species_dir, MANIFEST_NAME)
+    fingerprint = _source_fingerprint(source)
+
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            if json.load(f) == fingerprint:
+                return
+    except (OSError, ValueError):
+        pass
+
+    os.makedirs(species_dir, exist_ok=True)
+    current = {os.path.basename(_model_path(species, state, history_hash(history)))
+               for state, history in histories.items()}
+    existing = set(os.listdir(species_dir))
+    # States still waiting for a model of their current history may warm-start from the old one
+    refit_slugs = {_state_slug(name) for name in current - existing}
+
+    # Keep the newest outdated model of each such state; drop every other stale model
+    stale = [name for name in existing
+             if name.endswith('.json') and name != MANIFEST_NAME and name not in current]
+    # The warm-up thread, page threads and other processes may evict at the same time
+    stale.sort(key=lambda name: _mtime(os.path.join(species_dir, name)), reverse=True)
+    for name in stale:
+        slug = _state_slug(name)
+        if slug in refit_slugs:
+            refit_slugs.discard(slug)
+            continue
+        try:
+            os.remove(os.path.join(species_dir, name))
+        except FileNotFoundError:
+            pass
+
+    _write_atomic(manifest_path, json.dumps(fingerprint))
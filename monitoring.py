@@ -0,0 +1,194 @@
+import folium
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+import warmup
+from data import load_dataset
+from forecasting import BACKENDS, MAX_HORIZON_YEAR, forecast_states
+from geo import attach_coordinates
+from instrumentation import span
+from lru import LRUCache
+from maps import add_count_layer, base_map
+from observations import load_hierarchy
+from render_cache import cached_html
+
+# Per-state (years, counts) series keyed by (species, fingerprint), and the figures built
+# from them keyed by (species, fingerprint, state)
+_series = LRUCache(maxsize=8)
+_figures = LRUCache(maxsize=256)
+
+
+def _title_html(title):
+    return f'''
+        <h3 align="center" style="font-size:20px"><b>{title}</b></h3>
+    '''
+
+
+def _legend_html(config):
+    high, medium = config.thresholds
+    high_color, medium_color, low_color = config.palette
+    return f'''
+    <div style="position: fixed;
+         bottom: 50px; left: 50px; width: 150px; height: 120px;
+         border:2px solid grey; z-index:9999; font-size:14px;
+         background-color:white; padding: 10px;">
+         <b>{config.name} Frequency</b><br>
+         <i class="fa fa-circle" style="color:{high_color}"></i> > {high} {config.plural}<br>
+         <i class="fa fa-circle" style="color:{medium_color}"></i> {medium}-{high} {config.plural}<br>
+         <i class="fa fa-circle" style="color:{low_color}"></i> < {medium} {config.plural}<br>
+    </div>
+    '''
+
+
+def build_count_map(config, located, count_column, title, font_size, label_width):
+    # Create a map centered around India with one bubble layer, a title and the legend
+    with span('map_build', species=config.key):
+        count_map = base_map()
+        add_count_layer(count_map, located, count_column, config.palette,
+                        font_size=font_size, label_width=label_width, thresholds=config.thresholds)
+        count_map.get_root().html.add_child(folium.Element(_title_html(title)))
+        count_map.get_root().html.add_child(folium.Element(_legend_html(config)))
+    return count_map
+
+
+def state_series(dataset):
+    # state -> (years, counts) from the dataset's long table, grouped once per dataset version
+    key = (dataset.species, dataset.fingerprint)
+    series = _series.get(key)
+    if series is None:
+        series = {state: (group['Year'].tolist(), group['Count'].tolist())
+                  for state, group in dataset.long.groupby('State', sort=False)}
+        _series.put(key, series)
+    return series
+
+
+def build_state_figure(config, state, years, counts):
+    # A single trace that the buttons restyle between line and bar, so the counts are only
+    # shipped to the browser once
+    fig = go.Figure(go.Scatter(x=years, y=counts, mode='lines+markers', name=f'{config.name} Count'))
+    fig.update_layout(
+        title=f'{config.name} Population in {state}',
+        xaxis_title='Year', yaxis_title=f'{config.name} Count',
+        updatemenus=[{
+            'type': 'buttons', 'direction': 'right', 'x': 1, 'xanchor': 'right', 'y': 1.15,
+            'buttons': [
+                {'label': 'Line', 'method': 'restyle', 'args': [{'type': 'scatter', 'mode': 'lines+markers'}]},
+                {'label': 'Bar', 'method': 'restyle', 'args': [{'type': 'bar'}]},
+            ],
+        }])
+    return fig
+
+
+def state_figure(config, dataset, state):
+    # Memoized per (species, dataset version, state); switching back to a state is a cache hit
+    key = (dataset.species, dataset.fingerprint, state)
+    fig = _figures.get(key)
+    if fig is None:
+        with span('chart_build', species=config.key):
+            years, counts = state_series(dataset)[state]
+            fig = build_state_figure(config, state, years, counts)
+        _figures.put(key, fig)
+    return fig
+
+
+def _stream_forecasts(dataset, value_name, future_year, backend):
+    # Show each state's forecast as soon as the pool returns it, then clear the live view
+    # once the map is ready to be drawn
+    state_count = dataset.wide['State'].nunique()
+    progress = st.progress(0.0, text=f'Forecasting {state_count} states...')
+    live_table = st.empty()
+    rows = []
+
+    def show_result(state, count):
+        rows.append({'State': state, value_name: round(float(count))})
+        progress.progress(len(rows) / state_count, text=f'{len(rows)} of {state_count} states forecast')
+        live_table.dataframe(pd.DataFrame(rows), hide_index=True)
+
+    with span('forecast', species=dataset.species, backend=backend):
+        future_df = forecast_states(dataset, value_name, future_year, on_result=show_result, backend=backend)
+    progress.empty()
+    live_table.empty()
+    return future_df
+
+
+def species_page(config):
+    st.markdown(
+        f'<h1 style="text-align: center; color: {config.title_color}; font-weight: bold;">'
+        f'{config.name} Monitoring in India</h1>',
+        unsafe_allow_html=True)
+
+    # Parsed once per file version and shared across reruns and sessions
+    with span('data_load', species=config.key):
+        dataset = load_dataset(config.key)
+
+    # Findings from the ingest validation (python -m validation prints the same report)
+    if len(dataset.report):
+        with st.expander(f'Data validation: {len(dataset.report)} finding(s) in {dataset.source}'):
+            st.dataframe(dataset.report, hide_index=True)
+    year_columns = dict(zip(dataset.years, dataset.year_columns))
+
+    # National totals are always available on top of the census states; district/reserve
+    # observations, when present, add finer views
+    with span('rollups', species=config.key):
+        hierarchy = load_hierarchy(config.key)
+    level = 'state'
+    if len(hierarchy.levels) > 1:
+        level = st.selectbox('View Level', hierarchy.levels, index=1, format_func=str.title)
+
+    if level == 'state' and hierarchy.fingerprint == dataset.fingerprint:
+        # Census data only: map the source's own columns
+        years, located, map_key = dataset.years, dataset.located, dataset.fingerprint
+        count_columns = year_columns
+    else:
+        years, located, map_key = hierarchy.years(level), hierarchy.rollups[level], hierarchy.fingerprint
+        count_columns = {year: year for year in years}
+
+    # Add a select box for year selection, one entry per year with data at this level
+    selected_year = st.selectbox('Select Year', years)
+
+    def build_historic_map():
+        return build_count_map(config, located, count_columns[selected_year],
+                               f'{config.name} Count in India ({selected_year})',
+                               config.label_font_size, config.label_width)
+
+    # Reuse the rendered map while the data, view level and selected year are unchanged
+    html = cached_html((config.key, map_key, 'historic', level, selected_year), build_historic_map)
+    st.components.v1.html(html, height=config.map_height)
+
+    selected_state = st.selectbox('Select a State', dataset.wide['State'].unique())
+
+    # One combined line/bar figure per state, built once per dataset version
+    fig = state_figure(config, dataset, selected_state)
+    st.plotly_chart(fig)
+
+    st.subheader(f'Predict Future {config.name} Counts')
+    col1, col2 = st.columns(2)
+
+    with col1:
+        future_year = st.number_input('Enter Future Year (2025 and onwards)', min_value=2025, max_value=MAX_HORIZON_YEAR, step=1)
+
+    with col2:
+        backend = st.selectbox('Forecasting Backend', list(BACKENDS))
+
+    # Let the user know when a background warm-up is still fitting this species
+    warm = warmup.status(config.key)
+    if warm is not None and warm['state'] == 'running' and warm['fingerprint'] == dataset.fingerprint:
+        st.caption(f'Pre-warming Prophet models: {warm["done"]} of {warm["total"]} states ready')
+
+    # Add a button to start the prediction
+    if st.button('Start Prediction'):
+        if future_year >= 2025:
+            def build_forecast_map():
+                # Forecast every state with the selected backend and map the predictions
+                value_name = f'Predicted {config.name} Count'
+                future_df = _stream_forecasts(dataset, value_name, future_year, BACKENDS[backend])
+                return build_count_map(config, attach_coordinates(future_df), value_name,
+                                       f'Predicted {config.name} Count in India ({future_year})',
+                                       config.forecast_label_font_size, config.forecast_label_width)
+
+            # A repeated forecast for the same year and backend skips both the forecast and the map build
+            html = cached_html((config.key, dataset.fingerprint, 'forecast', future_year, backend), build_forecast_map)
+            st.components.v1.html(html, height=config.forecast_map_height)
+        else:
+            st.error("Please enter a year greater than or equal to 2025.")
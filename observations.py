@@ -0,0 +1,167 @@
+import os
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+from data import _content_hash, load_dataset
+from geo import DEFAULT_LOCATION, attach_coordinates
+
+# Optional long-format observation file shared by all species (.parquet or .csv), one row per
+# region and year: species, region_id, region_level, state, year, count[, latitude, longitude].
+# state names the parent state of district/reserve rows and may be empty for state rows.
+OBSERVATIONS_PATH = os.environ.get('OBSERVATIONS_PATH', 'observations.parquet')
+
+# Coarsest to finest. The State-keyed census files supply the 'state' level; observations
+# can add finer levels, and state totals for states or years the census does not cover.
+LEVELS = ('national', 'state', 'district', 'reserve')
+
+# Compact dtypes for the observation table; region names repeat across years, so categoricals
+COLUMN_DTYPES = {
+    'species': 'category',
+    'region_id': 'category',
+    'region_level': 'category',
+    'state': 'category',
+    'year': 'int16',
+    'count': 'int32',
+    'latitude': 'float32',
+    'longitude': 'float32',
+}
+REQUIRED_COLUMNS = ('species', 'region_id', 'region_level', 'year', 'count')
+
+_observations = None
+_hierarchies = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Hierarchy:
+    species: str
+    # Census fingerprint plus the observation file's content hash
+    fingerprint: str
+    # Levels with data, coarsest first; always starts with national and state
+    levels: tuple
+    # level -> precomputed rollup: Region, State, Latitude, Longitude, then one count column per year
+    rollups: dict
+
+    def years(self, level):
+        return tuple(column for column in self.rollups[level].columns if isinstance(column, int))
+
+
+def _read_observations(path):
+    if path.endswith('.parquet'):
+        frame = pd.read_parquet(path)
+        frame = frame[[column for column in frame.columns if column in COLUMN_DTYPES]]
+    else:
+        frame = pd.read_csv(path, usecols=lambda column: column in COLUMN_DTYPES)
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f'{path} is missing observation columns: {", ".join(missing)}')
+    for column in ('state', 'latitude', 'longitude'):
+        if column not in frame.columns:
+            frame[column] = None
+    frame['region_level'] = frame['region_level'].astype(str).str.strip().str.casefold()
+    frame = frame.astype(COLUMN_DTYPES)
+
+    # Split once by species so each page only aggregates its own rows
+    return {str(species): rows for species, rows in frame.groupby('species', observed=True)}
+
+
+def _load_observations():
+    # (fingerprint, species -> rows) for the observation file, or (None, {}) without one.
+    # Re-read only when the file's mtime/size change; called with _lock held.
+    global _observations
+    if not os.path.exists(OBSERVATIONS_PATH):
+        _observations = None
+        return None, {}
+
+    stat = os.stat(OBSERVATIONS_PATH)
+    stamp = (OBSERVATIONS_PATH, stat.st_mtime_ns, stat.st_size)
+    if _observations is None or _observations[0] != stamp:
+        _observations = (stamp, _content_hash(OBSERVATIONS_PATH), _read_observations(OBSERVATIONS_PATH))
+    return _observations[1], _observations[2]
+
+
+def _pivot(rows):
+    # Long rows (region_id, state, year, count, ...) -> one row per region, one column per year
+    counts = rows.groupby(['region_id', 'year'], observed=True)['count'].sum().unstack('year')
+    counts.columns = [int(year) for year in counts.columns]
+    places = rows.groupby('region_id', observed=True).agg(
+        State=('state', 'first'), Latitude=('latitude', 'mean'), Longitude=('longitude', 'mean'))
+    rollup = places.join(counts).rename_axis('Region').reset_index()
+    rollup['Region'] = rollup['Region'].astype(str)
+    rollup['State'] = rollup['State'].astype(str)
+
+    # Regions without coordinates are drawn at their parent state
+    fallback = attach_coordinates(rollup[['State']])
+    rollup['Latitude'] = rollup['Latitude'].astype(float).fillna(fallback['Latitude'])
+    rollup['Longitude'] = rollup['Longitude'].astype(float).fillna(fallback['Longitude'])
+    return rollup
+
+
+def _state_rollup(dataset, rows):
+    # Census totals take precedence; observations fill in the states and years it lacks,
+    # from state-level rows or else the sum of the finest sub-state level present
+    census = dataset.long.dropna(subset=['Count']).set_index(['State', 'Year'])['Count']
+    if len(rows):
+        state_rows = rows[rows['region_level'] == 'state']
+        state_rows = state_rows.assign(state=state_rows['state'].astype(str).where(
+            state_rows['state'].notna(), state_rows['region_id'].astype(str)))
+        observed = state_rows.groupby(['state', 'year'], observed=True)['count'].sum()
+        for level in reversed(LEVELS[2:]):
+            finer = rows[rows['region_level'] == level]
+            if len(finer):
+                observed = observed.combine_first(finer.groupby(['state', 'year'], observed=True)['count'].sum())
+                break
+        observed.index = observed.index.set_names(['State', 'Year'])
+        observed.index = observed.index.set_levels(observed.index.levels[1].astype(int), level='Year')
+        census = census.combine_first(observed.astype(float))
+
+    wide = census.unstack('Year')
+    wide.columns = [int(year) for year in wide.columns]
+    located = attach_coordinates(wide.rename_axis('State').reset_index())
+    located.insert(0, 'Region', located['State'])
+    return located[['Region', 'State', 'Latitude', 'Longitude'] + list(wide.columns)]
+
+
+def _build_hierarchy(dataset, fingerprint, rows):
+    rollups = {'state': _state_rollup(dataset, rows)}
+
+    year_columns = rollups['state'].columns[4:]
+    national = rollups['state'][year_columns].sum(min_count=1).to_frame().T
+    national.insert(0, 'Region', 'India')
+    national.insert(1, 'State', 'India')
+    national.insert(2, 'Latitude', DEFAULT_LOCATION[0])
+    national.insert(3, 'Longitude', DEFAULT_LOCATION[1])
+    rollups['national'] = national
+
+    for level in LEVELS[2:]:
+        level_rows = rows[rows['region_level'] == level] if len(rows) else rows
+        if len(level_rows):
+            rollups[level] = _pivot(level_rows)
+
+    levels = tuple(level for level in LEVELS if level in rollups)
+    return Hierarchy(species=dataset.species, fingerprint=fingerprint, levels=levels, rollups=rollups)
+
+
+def load_hierarchy(species):
+    # Rollups for every level of species, rebuilt only when the census file or the observation
+    # file changed. Shared between sessions; the frames must not be modified in place.
+    dataset = load_dataset(species)
+    with _lock:
+        observation_fingerprint, by_species = _load_observations()
+        fingerprint = dataset.fingerprint
+        if observation_fingerprint is not None:
+            fingerprint = f'{fingerprint}-{observation_fingerprint}'
+
+        cached = _hierarchies.get(species)
+        if cached is not None and cached.fingerprint == fingerprint:
+            return cached
+
+        rows = by_species.get(species)
+        if rows is None:
+            rows = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in COLUMN_DTYPES.items()})
+        hierarchy = _build_hierarchy(dataset, fingerprint, rows)
+        _hierarchies[species] = hierarchy
+        return hierarchy
@@ -0,0 +1,32 @@
+import os
+import zlib
+
+import instrumentation
+from lru import LRUCache
+
+# Upper bound on the stored HTML, in bytes (compressed size when compression is on)
+MAX_BYTES = int(os.environ.get('RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+# Folium documents are highly repetitive, so compressing them is cheap and shrinks them ~5x
+COMPRESS = os.environ.get('RENDER_CACHE_COMPRESS', '1') != '0'
+
+_html = LRUCache(maxsize=MAX_BYTES, sizeof=len)
+
+
+def cached_html(key, build_map):
+    # Return the rendered HTML for key, building and serializing the map only on a miss.
+    # key should identify everything the map depends on, e.g.
+    # (species, dataset fingerprint, 'historic', year) or (species, fingerprint, 'forecast', year, backend).
+    stored = _html.get(key)
+    if stored is not None:
+        return zlib.decompress(stored).decode('utf-8') if COMPRESS else stored
+
+    folium_map = build_map()
+    with instrumentation.span('map_serialize', species=str(key[0])):
+        html = folium_map._repr_html_()
+    _html.put(key, zlib.compress(html.encode('utf-8'), 6) if COMPRESS else html)
+    return html
+
+
+def clear():
+    _html.clear()
@@ -0,0 +1,138 @@
+import threading
+
+from lru import LRUCache
+
+
+class _Flight:
+    # Items produced so far for one key, and how the computation ended: state is 'running',
+    # 'done', 'failed' (error holds the exception) or 'abandoned'
+
+    def __init__(self):
+        self.items = []
+        self.state = 'running'
+        self.error = None
+        self.changed = threading.Condition()
+
+
+def _iterate(produce):
+    # Calling produce happens on the first next(), so its errors count as computation errors
+    yield from produce()
+
+
+class SingleFlight:
+    # Coalesces concurrent calls for the same key onto one computation.
+    #   hit:  a completed result for the key was still cached
+    #   join: the caller attached to a computation already in flight
+    #   miss: the caller ran the computation itself
+    # The computation only produces items; every caller streams them to its own on_item
+    # callback in its own thread, so no caller's callback runs inside the shared computation.
+
+    def __init__(self, cache_size=0):
+        self._inflight = {}
+        self._results = LRUCache(cache_size) if cache_size else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.joins = 0
+        self.misses = 0
+
+    def do(self, key, produce, on_item=None):
+        # Return (items, computed): the list of items yielded by produce(), and True only for
+        # the caller that ran it. Each item is also passed to on_item as soon as it is
+        # available. An Exception raised by produce is raised in every caller waiting on it.
+        # If the running caller is interrupted instead (a BaseException such as Streamlit's
+        # rerun, or its own on_item failing), a waiting caller takes the work over and
+        # restarts it, so on_item may see an item again after a takeover.
+        while True:
+            owner = False
+            with self._lock:
+                if self._results is not None and key in self._results:
+                    self.hits += 1
+                    items = self._results.get(key)
+                    break
+                flight = self._inflight.get(key)
+                if flight is not None:
+                    self.joins += 1
+                else:
+                    self.misses += 1
+                    flight = self._inflight[key] = _Flight()
+                    owner = True
+
+            if owner:
+                return self._run(key, flight, produce, on_item), True
+            items = self._follow(flight, on_item)
+            if items is not None:
+                return items, False
+
+        if on_item is not None:
+            for item in items:
+                on_item(item)
+        return items, False
+
+    def _run(self, key, flight, produce, on_item):
+        iterator = _iterate(produce)
+        try:
+            while True:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                except Exception as exc:
+                    self._settle(key, flight, 'failed', exc)
+                    raise
+                with flight.changed:
+                    flight.items.append(item)
+                    flight.changed.notify_all()
+                if on_item is not None:
+                    on_item(item)
+        except BaseException:
+            # Not a computation error (those are settled above): hand the work to a waiter
+            iterator.close()
+            self._settle(key, flight, 'abandoned')
+            raise
+        self._settle(key, flight, 'done')
+        return flight.items
+
+    def _follow(self, flight, on_item):
+        # Stream the flight's items to on_item until it ends. Returns its items, raises its
+        # error, or returns None if the owner abandoned it.
+        delivered = 0
+        while True:
+            with flight.changed:
+                flight.changed.wait_for(lambda: len(flight.items) > delivered or flight.state != 'running')
+                items = flight.items[delivered:]
+                state = flight.state
+            delivered += len(items)
+            if on_item is not None:
+                for item in items:
+                    on_item(item)
+            if state == 'done':
+                return flight.items
+            if state == 'failed':
+                raise flight.error
+            if state == 'abandoned':
+                return None
+
+    def _settle(self, key, flight, state, error=None):
+        # Retire the flight before waking waiters, so a retry never joins an abandoned flight
+        # and a finished result is already cached for the next caller
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+            if state == 'done' and self._results is not None:
+                self._results.put(key, flight.items)
+        with flight.changed:
+            if flight.state == 'running':
+                flight.state = state
+                flight.error = error
+            flight.changed.notify_all()
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.joins + self.misses
+            return {
+                'hits': self.hits,
+                'joins': self.joins,
+                'misses': self.misses,
+                'inflight': len(self._inflight),
+                'dedup_rate': (self.hits + self.joins) / requests if requests else 0.0,
+            }
@@ -0,0 +1,49 @@
+import importlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SpeciesConfig:
+    # Everything the monitoring engine needs to know about one species page
+    key: str
+    name: str
+    plural: str
+    source: str
+    title_color: str
+    # Bubble colours for counts above the high threshold, above the medium one, and the rest
+    palette: tuple
+    thresholds: tuple = (200, 50)
+    label_font_size: float = 8.5
+    label_width: float = 8
+    forecast_label_font_size: float = 8.5
+    forecast_label_width: float = 8
+    map_height: int = 700
+    forecast_map_height: int = 700
+
+
+# Species registry: sidebar label -> config. Adding a species only needs a new entry here.
+SPECIES = {
+    'Tigers': SpeciesConfig(
+        key='tigers', name='Tiger', plural='Tigers', source='tiger_historic_data.xlsx',
+        title_color='skyblue', palette=('green', 'yellow', 'red'),
+        label_font_size=10, label_width=40, forecast_label_font_size=9, forecast_label_width=8,
+        forecast_map_height=800),
+    'Leopards': SpeciesConfig(
+        key='leopards', name='Leopard', plural='Leopards', source='leopard_historic_data.csv',
+        title_color='orange', palette=('green', 'purple', 'orange'),
+        forecast_map_height=900),
+    'Elephants': SpeciesConfig(
+        key='elephants', name='Elephant', plural='Elephants', source='elephant_historic_data.csv',
+        title_color='lightgreen', palette=('pink', 'orange', 'yellow'),
+        label_width=4, forecast_label_width=4),
+}
+
+# Same configs keyed by the short species key used by the data layer and caches
+BY_KEY = {config.key: config for config in SPECIES.values()}
+
+
+def load_page(name):
+    # The engine pulls in folium and plotly, so it is only imported once a page is selected
+    config = SPECIES[name]
+    monitoring = importlib.import_module('monitoring')
+    return lambda: monitoring.species_page(config)
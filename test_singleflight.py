@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+class Interrupted(BaseException):
+    # Stands in for Streamlit's RerunException/StopException, which are not Exceptions
+    pass
+
+
+def _gated(items, started, release):
+    # A produce function that yields its first item, then waits until release is set
+    def produce():
+        yield items[0]
+        started.set()
+        assert release.wait(5)
+        yield from items[1:]
+    return produce
+
+
+def _join(flights, key, produce, on_item, outcome):
+    # Run flights.do in a thread, recording its return value or exception in outcome
+    def run():
+        try:
+            outcome['result'] = flights.do(key, produce, on_item=on_item)
+        except BaseException as exc:
+            outcome['error'] = exc
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_joins(flights, joins):
+    for _ in range(500):
+        if flights.stats()['joins'] >= joins:
+            return
+        time.sleep(0.01)
+    raise AssertionError('caller never joined the flight')
+
+
+def test_miss_then_hit_streams_cached_items():
+    flights = SingleFlight(cache_size=4)
+    assert flights.do('key', lambda: iter([1, 2])) == ([1, 2], True)
+
+    seen = []
+    assert flights.do('key', lambda: pytest.fail('recomputed'), on_item=seen.append) == ([1, 2], False)
+    assert seen == [1, 2]
+    assert flights.stats()['hits'] == 1
+
+
+def test_join_streams_items_to_each_callers_own_callback():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    owner_seen, joiner_seen = [], []
+    owner, joiner = {}, {}
+
+    owner_thread = _join(flights, 'key', _gated([1, 2, 3], started, release), owner_seen.append, owner)
+    assert started.wait(5)
+    joiner_thread = _join(flights, 'key', lambda: pytest.fail('recomputed'), joiner_seen.append, joiner)
+    _wait_for_joins(flights, 1)
+    release.set()
+    owner_thread.join(5)
+    joiner_thread.join(5)
+
+    assert owner['result'] == ([1, 2, 3], True)
+    assert joiner['result'] == ([1, 2, 3], False)
+    assert owner_seen == joiner_seen == [1, 2, 3]
+    assert flights.stats()['inflight'] == 0
+
+
+def test_computation_error_reaches_waiting_callers():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def produce():
+        yield 1
+        started.set()
+        assert release.wait(5)
+        raise ValueError('bad census')
+
+    owner, joiner = {}, {}
+    owner_thread = _join(flights, 'key', produce, None, owner)
+    assert started.wait(5)
+    joiner_thread = _join(flights, 'key', lambda: pytest.fail('recomputed'), None, joiner)
+    _wait_for_joins(flights, 1)
+    release.set()
+    owner_thread.join(5)
+    joiner_thread.join(5)
+
+    assert isinstance(owner['error'], ValueError)
+    assert isinstance(joiner['error'], ValueError)
+
+
+def test_interrupted_owner_hands_the_work_to_a_waiting_caller():
+    flights = SingleFlight(cache_size=4)
+    started, release = threading.Event(), threading.Event()
+
+    def interrupt_owner(item):
+        if item == 2:
+            raise Interrupted()
+
+    owner, joiner = {}, {}
+    joiner_seen = []
+    owner_thread = _join(flights, 'key', _gated([1, 2, 3], started, release), interrupt_owner, owner)
+    assert started.wait(5)
+    joiner_thread = _join(flights, 'key', lambda: iter([1, 2, 3]), joiner_seen.append, joiner)
+    _wait_for_joins(flights, 1)
+    release.set()
+    owner_thread.join(5)
+    joiner_thread.join(5)
+
+    # The interruption stays with the owner; the waiter reruns the computation itself
+    assert isinstance(owner['error'], Interrupted)
+    assert joiner['result'] == ([1, 2, 3], True)
+    assert joiner_seen[-3:] == [1, 2, 3]
+    assert flights.do('key', lambda: pytest.fail('recomputed')) == ([1, 2, 3], False)
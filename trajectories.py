@@ -0,0 +1,94 @@
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+from plotly.subplots import make_subplots
+
+from data import load_dataset
+from forecasting import BACKENDS, MAX_HORIZON_YEAR, forecast_cube
+from instrumentation import span
+from species import SPECIES
+
+# States drawn per species before the user picks their own
+DEFAULT_STATES = 6
+
+# Subplots per row of a species' chart
+COLUMNS = 3
+
+# Backend name -> UI label
+_LABELS = {backend: label for label, backend in BACKENDS.items()}
+
+
+def _trajectory_figure(config, dataset, cube, states):
+    # One subplot per state: the history, then every backend's forecast in the cube as a line
+    # over its shaded interval, so backends can be compared state by state
+    rows = (len(states) + COLUMNS - 1) // COLUMNS
+    fig = make_subplots(rows=rows, cols=min(len(states), COLUMNS), subplot_titles=states)
+    history = dataset.long.dropna(subset=['Count'])
+    forecasts = cube[cube['species'] == dataset.species]
+    backends = list(forecasts['backend'].unique())
+    colors = dict(zip(backends, [config.title_color] + px.colors.qualitative.Plotly))
+
+    for index, state in enumerate(states):
+        cell = {'row': index // COLUMNS + 1, 'col': index % COLUMNS + 1}
+        past = history[history['State'] == state]
+        fig.add_trace(go.Scatter(x=past['Year'], y=past['Count'], mode='lines+markers', name='History',
+                                 line={'color': 'black'}, legendgroup='History', showlegend=index == 0), **cell)
+        for backend in backends:
+            forecast = forecasts[(forecasts['state'] == state) & (forecasts['backend'] == backend)]
+            years = forecast['year'].tolist()
+            fig.add_trace(go.Scatter(x=years + years[::-1],
+                                     y=forecast['yhat_upper'].tolist() + forecast['yhat_lower'].tolist()[::-1],
+                                     fill='toself', fillcolor=colors[backend], opacity=0.2, mode='lines',
+                                     line={'width': 0}, hoverinfo='skip', legendgroup=backend,
+                                     showlegend=False), **cell)
+            fig.add_trace(go.Scatter(x=years, y=forecast['yhat'], mode='lines', name=_LABELS[backend],
+                                     line={'color': colors[backend]}, legendgroup=backend,
+                                     showlegend=index == 0), **cell)
+    fig.update_layout(height=300 * rows)
+    return fig
+
+
+def trajectories_page():
+    st.markdown(
+        '<h1 style="text-align: center; font-weight: bold;">Forecast Trajectories</h1>',
+        unsafe_allow_html=True)
+
+    selected_species = st.multiselect('Species', list(SPECIES), default=list(SPECIES))
+    col1, col2 = st.columns(2)
+    with col1:
+        start_year, end_year = st.slider('Forecast Years', min_value=2025, max_value=MAX_HORIZON_YEAR,
+                                         value=(2025, 2050))
+    with col2:
+        # Picking more than one backend overlays their forecasts for comparison
+        labels = st.multiselect('Forecasting Backends', list(BACKENDS), default=list(BACKENDS)[:1])
+    backends = [BACKENDS[label] for label in labels]
+
+    datasets = [load_dataset(SPECIES[name].key) for name in selected_species]
+    # The cube survives reruns (e.g. picking other states) until the inputs change
+    request = (tuple((dataset.species, dataset.fingerprint) for dataset in datasets), start_year, end_year,
+               tuple(backends))
+    if st.button('Forecast All Years') and datasets and backends:
+        with st.spinner(f'Forecasting {len(datasets)} species for {end_year - start_year + 1} years...'):
+            with span('forecast_cube', backend=','.join(backends)):
+                cube = forecast_cube(datasets, start_year, end_year, backends)
+        st.session_state['trajectory_cube'] = (request, cube)
+
+    stored = st.session_state.get('trajectory_cube')
+    if stored is None or stored[0] != request:
+        return
+    cube = stored[1]
+
+    for name, dataset in zip(selected_species, datasets):
+        config = SPECIES[name]
+        st.subheader(f'{config.name} Population Trajectories')
+        all_states = list(dataset.wide['State'].unique())
+        states = st.multiselect(f'{config.name} States', all_states, default=all_states[:DEFAULT_STATES])
+        if not states:
+            continue
+
+        with span('chart_build', species=dataset.species):
+            fig = _trajectory_figure(config, dataset, cube, states)
+        st.plotly_chart(fig)
+
+    st.download_button('Download Forecast Cube', cube.to_csv(index=False),
+                       file_name=f'forecast_cube_{start_year}_{end_year}.csv', mime='text/csv')
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+# Forecasts are bounded per state: below by FLOOR and above by CAP_FACTOR times the state's
+# historic maximum (at least 1). The logistic trends here and in Prophet's logistic growth
+# (forecasting.new_model) fit between these bounds, rather than being clipped to them.
+FLOOR = 0.0
+CAP_FACTOR = 1.5
+
+# Two-sided z-score matching Prophet's default 80% uncertainty interval
+INTERVAL_Z = 1.2816
+
+_EPS = 1e-6
+
+
+def census_matrix(df):
+    # Split the wide census table into census years (n_years) and counts (n_states x n_years)
+    year_columns = df.columns[1:]
+    years = year_columns.str.extract(r'(\d{4})', expand=False).astype(int).to_numpy()
+    counts = df[year_columns].to_numpy(dtype=float)
+    return years, counts
+
+
+def count_bounds(counts):
+    # Per-state (floor, cap) columns of shape (n_states, 1) derived from the historic counts;
+    # missing counts are ignored, here and in the fits of forecast_matrix
+    cap = np.fmax(np.fmax.reduce(counts, axis=1) * CAP_FACTOR, 1)[:, None]
+    return np.full_like(cap, FLOOR), cap
+
+
+def _least_squares(t, values):
+    # Closed-form OLS of every row of values against t, vectorized over rows. Missing (NaN)
+    # values get zero weight, so a state with a gap is fitted on the years it does have.
+    # Returns intercepts, slopes, the residual standard deviation per row and the per-row
+    # weighted mean and spread of t that _leverage needs.
+    weights = ~np.isnan(values)
+    filled = np.where(weights, values, 0.0)
+    n = weights.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+    t_mean = (weights * t).sum(axis=1) / safe_n
+    dt = np.where(weights, t - t_mean[:, None], 0.0)
+    sxx = (dt ** 2).sum(axis=1)
+    mean = filled.sum(axis=1) / safe_n
+    # Rows with fewer than two distinct years have no trend and keep their mean
+    slope = np.divide((dt * filled).sum(axis=1), sxx, out=np.zeros_like(sxx), where=sxx > 0)
+    intercept = mean - slope * t_mean
+    residuals = np.where(weights, filled - intercept[:, None] - slope[:, None] * t, 0.0)
+    dof = np.maximum(n - 2, 1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+    return intercept, slope, sigma, (safe_n, t_mean, sxx)
+
+
+def _leverage(spread, t_future):
+    # Prediction-interval scale of every row at t_future, given the spread from _least_squares
+    n, t_mean, sxx = spread
+    distance = (t_future - t_mean[:, None]) ** 2
+    return np.sqrt(1 + 1 / n[:, None] + np.divide(distance, sxx[:, None], out=np.zeros_like(distance),
+                                                  where=sxx[:, None] > 0))
+
+
+def forecast_matrix(df, future_years, horizon=None):
+    # Fit a linear and a logistic-growth trend to every state at once and keep, per state,
+    # whichever reproduces the history better. The logistic trend stays within the state's
+    # count_bounds by construction; the linear one is only kept where it stays within them
+    # over the whole forecast horizon (first, last year; defaults to the span of
+    # future_years), so no forecast is negative and the choice does not depend on the years
+    # asked for. Returns yhat, yhat_lower and yhat_upper arrays of shape
+    # (n_states, len(future_years)).
+    years, counts = census_matrix(df)
+    future_years = np.asarray(future_years, dtype=float)
+
+    # Centre time so the normal equations stay well conditioned
+    t_mean = years.mean()
+    t = years - t_mean
+    t_future = future_years - t_mean
+
+    floor, cap = count_bounds(counts)
+
+    # Linear trend. It is monotone, so it stays within [floor, cap] over the horizon exactly
+    # when it does at both ends.
+    if horizon is None:
+        horizon = (future_years.min(), future_years.max())
+    intercept, slope, sigma, spread = _least_squares(t, counts)
+    linear = intercept[:, None] + slope[:, None] * t_future
+    linear_fit = intercept[:, None] + slope[:, None] * t
+    linear_ends = intercept[:, None] + slope[:, None] * (np.asarray(horizon, dtype=float) - t_mean)
+    linear_bounded = ((linear_ends >= floor) & (linear_ends <= cap)).all(axis=1)
+    linear_band = INTERVAL_Z * sigma[:, None] * _leverage(spread, t_future)
+
+    # Logistic trend between floor and cap: a linear fit in logit space
+    share = np.clip((counts - floor) / (cap - floor), _EPS, 1 - _EPS)
+    intercept, slope, sigma, spread = _least_squares(t, np.log(share / (1 - share)))
+    logit = intercept[:, None] + slope[:, None] * t_future
+    logit_fit = intercept[:, None] + slope[:, None] * t
+    logit_band = INTERVAL_Z * sigma[:, None] * _leverage(spread, t_future)
+
+    def expit(x):
+        return floor + (cap - floor) / (1 + np.exp(-x))
+
+    # Prefer the logistic trend where it is strictly closer to the history or the linear one
+    # leaves the bounds; missing counts do not count towards either error
+    linear_sse = np.nansum((counts - linear_fit) ** 2, axis=1)
+    logistic_sse = np.nansum((counts - expit(logit_fit)) ** 2, axis=1)
+    use_logistic = ((logistic_sse < linear_sse) | ~linear_bounded)[:, None]
+
+    yhat = np.where(use_logistic, expit(logit), linear)
+    # The linear trend itself stays within the bounds; its interval is held there too
+    lower = np.where(use_logistic, expit(logit - logit_band), np.clip(linear - linear_band, floor, cap))
+    upper = np.where(use_logistic, expit(logit + logit_band), np.clip(linear + linear_band, floor, cap))
+    return yhat, lower, upper
+
+
+def forecast_frame(df, future_years, horizon=None):
+    # Long State/Year/yhat/yhat_lower/yhat_upper frame for every state and future year
+    yhat, lower, upper = forecast_matrix(df, future_years, horizon)
+    return pd.DataFrame({
+        'State': np.repeat(df['State'].to_numpy(), len(future_years)),
+        'Year': np.tile(np.asarray(future_years), len(df)),
+        'yhat': yhat.ravel(),
+        'yhat_lower': lower.ravel(),
+        'yhat_upper': upper.ravel(),
+    })
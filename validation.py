@@ -0,0 +1,110 @@
+"""Validate and clean the historic census tables on ingest.
+
+    python -m validation [--species tigers ...]
+
+data.load_dataset runs clean_wide once per source version: state names are trimmed, counts
+coerced to numbers, negative counts and repeated states dropped, and missing counts, unknown
+states and outliers flagged. The resulting report is kept on the Dataset and shown on the
+species page; this command prints it for every species.
+"""
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from geo import STATE_LOCATIONS, normalize_state_names
+
+# Counts this many robust standard deviations from their state's typical (log) count are
+# flagged as outliers. Only positive counts take part, since zero means "not present".
+OUTLIER_Z = 3.5
+
+# Lower bound on the log-scale spread, so a state with near-constant counts does not flag
+# every small change
+MIN_LOG_SPREAD = 0.5
+
+# States left with fewer usable counts than this are flagged; Prophet cannot fit them, so
+# forecasting carries their last known level forward instead
+MIN_HISTORY = 2
+
+REPORT_COLUMNS = ['State', 'Year', 'Count', 'Issue']
+
+_KNOWN_STATES = set(normalize_state_names(list(STATE_LOCATIONS)))
+
+
+def _cell_issues(states, years, mask, values, issue):
+    rows, columns = np.nonzero(mask)
+    return pd.DataFrame({'State': states[rows], 'Year': years[columns],
+                         'Count': values[rows, columns], 'Issue': issue})
+
+
+def _state_issues(states, mask, issue):
+    return pd.DataFrame({'State': states[mask], 'Year': None, 'Count': np.nan, 'Issue': issue})
+
+
+def outlier_mask(values):
+    # Robust z-score of each positive count against its own state's counts, in log space
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        # States without any positive count give all-NaN rows and are never flagged
+        warnings.simplefilter('ignore', RuntimeWarning)
+        logs = np.log(np.where(values > 0, values, np.nan))
+        median = np.nanmedian(logs, axis=1, keepdims=True)
+        spread = 1.4826 * np.nanmedian(np.abs(logs - median), axis=1, keepdims=True)
+        z = np.abs(logs - median) / np.maximum(np.nan_to_num(spread), MIN_LOG_SPREAD)
+    return np.nan_to_num(z) > OUTLIER_Z
+
+
+def clean_wide(wide):
+    # Return (cleaned wide table, report). The report has one State/Year/Count/Issue row per
+    # finding; Year is None for findings about a whole state.
+    year_columns = list(wide.columns[1:])
+    raw_states = wide['State'].astype(str)
+    states = raw_states.str.strip().str.replace(r'\s+', ' ', regex=True)
+    numeric = wide[year_columns].apply(pd.to_numeric, errors='coerce')
+
+    years = pd.Index(year_columns).astype(str).str.extract(r'(\d{4})', expand=False).to_numpy(dtype=object)
+    state_array = states.to_numpy(dtype=object)
+    values = numeric.to_numpy(dtype=float)
+    raw_missing = wide[year_columns].isna().to_numpy()
+    duplicated = states.duplicated().to_numpy()
+    unknown = ~normalize_state_names(states).isin(_KNOWN_STATES).to_numpy()
+    # Counted after negative counts are dropped below
+    usable = (values >= 0).sum(axis=1)
+
+    issues = [
+        _state_issues(state_array, (raw_states != states).to_numpy(), 'name_normalized'),
+        _state_issues(state_array, duplicated, 'duplicate_state'),
+        _state_issues(state_array, unknown & ~duplicated, 'unknown_state'),
+        _state_issues(state_array, (usable < MIN_HISTORY) & ~duplicated, 'insufficient_history'),
+        _cell_issues(state_array, years, np.isnan(values) & ~raw_missing, values, 'not_a_number'),
+        _cell_issues(state_array, years, raw_missing, values, 'missing'),
+        _cell_issues(state_array, years, values < 0, values, 'negative'),
+        _cell_issues(state_array, years, outlier_mask(values), values, 'outlier'),
+    ]
+    issues = [issue for issue in issues if len(issue)]
+    report = pd.concat(issues, ignore_index=True) if issues else pd.DataFrame(columns=REPORT_COLUMNS)
+
+    # Negative counts are kept out of the data entirely; outliers stay but are reported
+    numeric = numeric.mask(numeric < 0)
+    cleaned = pd.concat([states.rename('State'), numeric], axis=1)[~duplicated].reset_index(drop=True)
+    return cleaned, report
+
+
+def main():
+    from data import SOURCES, load_dataset
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--species', action='append', choices=sorted(SOURCES),
+                        help='species to validate (repeatable, default all)')
+    args = parser.parse_args()
+
+    for species in args.species or list(SOURCES):
+        report = load_dataset(species).report
+        summary = ', '.join(f'{count} {issue}' for issue, count in report['Issue'].value_counts().items())
+        print(f'{species}: {summary or "no issues"}')
+        if len(report):
+            print(report.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Processes used for warm-up fits, separate from the pool serving page requests
+WORKERS = int(os.environ.get('WARMUP_WORKERS', 1))
+
+# How often the warm-up thread checks the census files for changes
+POLL_SECONDS = float(os.environ.get('WARMUP_POLL_SECONDS', 60))
+
+# Scheduling niceness of the warm-up processes, so page requests get the CPU first
+NICENESS = 10
+
+logger = logging.getLogger('warmup')
+
+# species -> {'fingerprint', 'done', 'total', 'state'}; state is 'running', 'ready' or 'failed'
+_status = {}
+_lock = threading.Lock()
+_thread = None
+_stop = threading.Event()
+
+
+def _lower_priority():
+    # Runs in each warm-up process; os.nice is not available on Windows
+    if hasattr(os, 'nice'):
+        os.nice(NICENESS)
+
+
+def _set_status(species, **fields):
+    with _lock:
+        _status.setdefault(species, {}).update(fields)
+
+
+def _new_executor():
+    return ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_lower_priority)
+
+
+def _warm(species_keys, poll_seconds):
+    # Heavy imports happen here, so starting the warm-up does not slow down the app shell
+    import forecasting
+    from data import load_dataset
+
+    executor = _new_executor()
+    warmed = {}
+    try:
+        while not _stop.is_set():
+            for species in species_keys:
+                try:
+                    dataset = load_dataset(species)
+                    if warmed.get(species) == dataset.fingerprint:
+                        continue
+                    total = dataset.wide['State'].nunique()
+                    _set_status(species, fingerprint=dataset.fingerprint, done=0, total=total, state='running')
+                    # Fitted tables land in the forecasting caches, where pages pick them up at once
+                    for done, _ in enumerate(forecasting.iter_state_tables(dataset, executor), 1):
+                        _set_status(species, done=done)
+                        if _stop.is_set():
+                            return
+                    _set_status(species, state='ready')
+                    warmed[species] = dataset.fingerprint
+                except Exception:
+                    logger.exception('forecast warm-up failed for %s', species)
+                    _set_status(species, state='failed')
+                    warmed[species] = None
+                    # A crashed worker breaks the whole pool; start the next attempt on a fresh one
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = _new_executor()
+            _stop.wait(poll_seconds)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start(species_keys=None, poll_seconds=POLL_SECONDS):
+    # Start the background warm-up once per process; later calls (every Streamlit rerun) are
+    # no-ops. Fits every state of every species with Prophet, then re-fits whenever a census
+    # file changes.
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        if species_keys is None:
+            from data import SOURCES
+            species_keys = list(SOURCES)
+        _thread = threading.Thread(target=_warm, args=(list(species_keys), poll_seconds),
+                                   name='forecast-warmup', daemon=True)
+        _thread.start()
+
+
+def stop(timeout=5):
+    # Ask the warm-up thread to finish after the fit in progress and wait for it
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+
+
+def status(species=None):
+    # Warm-up progress for one species (None if it was never warmed), or for all of them
+    with _lock:
+        if species is not None:
+            entry = _status.get(species)
+            return dict(entry) if entry is not None else None
+        return {key: dict(entry) for key, entry in _status.items()}